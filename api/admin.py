@@ -1,9 +1,226 @@
-from django.contrib import admin
-from .models import Project, Contributor, Issue, Comment
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils.functional import cached_property
 
+from . import cache, inbox, sharding
+from .models import Project, Contributor, Issue, IssueStatusTransition, Comment, InboxCounter, Notification
 
-# Register your models here.
-admin.site.register(Project)
-admin.site.register(Contributor)
-admin.site.register(Issue)
-admin.site.register(Comment)
+
+def estimate_count(model, using):
+    """
+    Nombre de lignes estimé d'une table à partir des statistiques de la base, ou None si indisponible.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+                [table]
+            )
+        elif connection.vendor == 'sqlite':
+            # Statistiques produites par la commande ANALYZE
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # Le premier nombre de chaque ligne est le nombre de lignes de la table
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginateur utilisant le nombre de lignes estimé par la base pour les listes non filtrées
+    des grandes tables, au lieu d'un `COUNT(*)` exact.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """
+    Base des classes d'administration : nombres de résultats estimés et pas de second `COUNT(*)`
+    pour afficher le total non filtré.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+def open_assignee_ids(issues):
+    return list(
+        issues.filter(status__in=Issue.OPEN_STATUSES, assignee__isnull=False)
+        .order_by().values_list('assignee_id', flat=True).distinct()
+    )
+
+
+@admin.register(Project)
+class ProjectAdmin(ScalableModelAdmin):
+    list_display = ['id', 'title', 'type', 'author', 'created_time']
+    list_select_related = ['author']
+    raw_id_fields = ['author']
+    search_fields = ['=id', 'title']
+
+    # La suppression des problèmes ne met pas à jour les compteurs de la boîte de réception :
+    # je les recalcule en une fois pour leurs assignés
+    def delete_model(self, request, obj):
+        assignee_ids = open_assignee_ids(Issue.objects.using(obj._state.db).filter(project=obj))
+        super().delete_model(request, obj)
+        inbox.recount(assignee_ids)
+
+    def delete_queryset(self, request, queryset):
+        assignee_ids = open_assignee_ids(Issue.objects.using(queryset.db).filter(project__in=queryset))
+        super().delete_queryset(request, queryset)
+        inbox.recount(assignee_ids)
+
+
+@admin.register(Contributor)
+class ContributorAdmin(ScalableModelAdmin):
+    list_display = ['id', 'user', 'project']
+    list_select_related = ['user', 'project']
+    raw_id_fields = ['user', 'project']
+
+    # Les compteurs de la boîte de réception dépendent des projets accessibles : je les recalcule
+    # pour les utilisateurs ajoutés ou retirés
+    def save_model(self, request, obj, form, change):
+        previous_user_id = form.initial.get('user') if change else None
+        super().save_model(request, obj, form, change)
+        inbox.recount([user_id for user_id in (previous_user_id, obj.user_id) if user_id is not None])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        if sharding.shards_enabled():
+            sharding.unindex_project_members(obj.project_id, [obj.user_id], obj._state.db)
+        inbox.recount([obj.user_id])
+
+    def delete_queryset(self, request, queryset):
+        members = {}
+        for project_id, user_id in queryset.values_list('project_id', 'user_id'):
+            members.setdefault(project_id, []).append(user_id)
+        database = queryset.db
+        super().delete_queryset(request, queryset)
+        if sharding.shards_enabled():
+            for project_id, user_ids in members.items():
+                sharding.unindex_project_members(project_id, user_ids, database)
+        inbox.recount(user_id for user_ids in members.values() for user_id in user_ids)
+
+
+class IssueActionForm(ActionForm):
+    assignee = forms.IntegerField(required=False, label='Assignee (user id)')
+
+
+@admin.register(Issue)
+class IssueAdmin(ScalableModelAdmin):
+    list_display = ['id', 'title', 'project', 'assignee', 'status', 'priority', 'tag', 'created_time']
+    list_select_related = ['project', 'assignee']
+    list_filter = ['status', 'priority', 'tag']
+    raw_id_fields = ['project', 'assignee', 'author']
+    search_fields = ['=id']
+    action_form = IssueActionForm
+    actions = ['close_issues', 'reassign_issues']
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        inbox.recount([obj.assignee_id] if obj.assignee_id is not None else [])
+
+    def delete_queryset(self, request, queryset):
+        assignee_ids = open_assignee_ids(queryset)
+        super().delete_queryset(request, queryset)
+        inbox.recount(assignee_ids)
+
+    @admin.action(description='Close selected issues')
+    def close_issues(self, request, queryset):
+        with transaction.atomic(using=queryset.db):
+            issues = list(queryset.exclude(status='DONE').values_list('pk', 'project_id', 'status', 'assignee_id'))
+            updated = queryset.exclude(status='DONE').update(status='DONE')
+            # `update()` ne passe pas par Issue.save : j'écris l'historique des statuts en une requête
+            IssueStatusTransition.objects.using(queryset.db).bulk_create(
+                [
+                    IssueStatusTransition(issue_id=pk, project_id=project_id, from_status=status, to_status='DONE')
+                    for pk, project_id, status, _ in issues
+                ],
+                batch_size=1000
+            )
+        cache.invalidate(Issue, [pk for pk, _, _, _ in issues], queryset.db)
+        inbox.recount(assignee_id for _, _, _, assignee_id in issues if assignee_id is not None)
+        self.message_user(request, f'{updated} issue(s) closed.', messages.SUCCESS)
+
+    @admin.action(description='Reassign selected issues')
+    def reassign_issues(self, request, queryset):
+        try:
+            assignee_id = int(request.POST.get('assignee'))
+        except (TypeError, ValueError):
+            assignee_id = None
+        if assignee_id is None or not User.objects.filter(pk=assignee_id).exists():
+            self.message_user(request, 'Please provide a valid assignee id.', messages.ERROR)
+            return
+        # Comme dans l'API, l'assigné doit être l'auteur du projet ou un de ses contributeurs
+        allowed = queryset.filter(
+            Q(project__author_id=assignee_id)
+            | Exists(Contributor.objects.filter(project_id=OuterRef('project_id'), user_id=assignee_id))
+        )
+        skipped = queryset.exclude(pk__in=allowed.values('pk')).count()
+        with transaction.atomic(using=queryset.db):
+            issues = list(
+                allowed.exclude(assignee_id=assignee_id)
+                .values_list('pk', 'project_id', 'title', 'status', 'assignee_id')
+            )
+            Issue.objects.using(queryset.db).filter(pk__in=[pk for pk, _, _, _, _ in issues]).update(
+                assignee_id=assignee_id
+            )
+            # Une notification par problème réassigné, écrite dans la même transaction (outbox),
+            # sauf si l'administrateur se les assigne lui-même (comme notify_assignment)
+            if assignee_id != request.user.id:
+                Notification.objects.using(queryset.db).bulk_create(
+                    [
+                        Notification(
+                            recipient_id=assignee_id,
+                            kind='ASSIGNMENT',
+                            payload={
+                                'project': project_id, 'issue': pk, 'title': title, 'actor': request.user.username
+                            }
+                        )
+                        for pk, project_id, title, _, _ in issues
+                    ],
+                    batch_size=1000
+                )
+        cache.invalidate(Issue, [pk for pk, _, _, _, _ in issues], queryset.db)
+        previous_assignee_ids = [previous for _, _, _, _, previous in issues if previous is not None]
+        inbox.recount([assignee_id, *previous_assignee_ids])
+        if assignee_id != request.user.id:
+            InboxCounter.objects.adjust(
+                assignee_id,
+                unread_delta=sum(1 for _, _, _, status, _ in issues if status in Issue.OPEN_STATUSES)
+            )
+        self.message_user(request, f'{len(issues)} issue(s) reassigned.', messages.SUCCESS)
+        if skipped:
+            self.message_user(
+                request,
+                f'{skipped} issue(s) skipped: the assignee is neither the author nor a contributor of their project.',
+                messages.WARNING
+            )
+
+
+@admin.register(Comment)
+class CommentAdmin(ScalableModelAdmin):
+    list_display = ['id', 'issue', 'author', 'created_time']
+    list_select_related = ['issue', 'author']
+    raw_id_fields = ['issue', 'author']
@@ -0,0 +1,198 @@
+import contextvars
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework.views import APIView
+
+from .routers import _current_shard, use_primary
+from .sharding import ProjectMoving, shard_for_project, shards_enabled
+
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# En-têtes propres à la réponse globale, inutiles dans chaque résultat
+OMITTED_HEADERS = {'content-type', 'content-length', 'vary', 'allow', 'x-frame-options'}
+
+
+class BatchError(Exception):
+    """
+    Lot de sous-requêtes invalide.
+    """
+
+
+def parse_batch(data):
+    """
+    Valide le corps d'une requête `/batch/` et retourne la liste des sous-requêtes
+    sous la forme (méthode, chemin, corps).
+    """
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BatchError('"requests" must be a non-empty list.')
+    if len(items) > settings.BATCH_MAX_REQUESTS:
+        raise BatchError(f'A batch may contain at most {settings.BATCH_MAX_REQUESTS} requests.')
+    specs = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise BatchError('Each request must be an object.')
+        method = str(item.get('method', 'GET')).upper()
+        path = item.get('path')
+        if method not in METHODS:
+            raise BatchError(f'Unsupported method: {method}.')
+        if not isinstance(path, str) or not path.startswith('/'):
+            raise BatchError('Each request must have an absolute "path".')
+        specs.append((method, path, item.get('body')))
+    return specs
+
+
+def build_request(parent, method, path, body):
+    """
+    Construit la sous-requête Django à partir de la requête `/batch/` : mêmes en-têtes,
+    et même utilisateur (l'authentification n'est pas rejouée).
+    """
+    path, _, query = path.partition('?')
+    data = json.dumps(body).encode() if body is not None else b''
+    request = HttpRequest()
+    request.method = method
+    request.path = request.path_info = path
+    request.META = {
+        key: value for key, value in parent.META.items()
+        if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE', 'QUERY_STRING', 'HTTP_X_PROFILE')
+    }
+    request.META.update(
+        REQUEST_METHOD=method,
+        PATH_INFO=path,
+        QUERY_STRING=query,
+        CONTENT_TYPE='application/json',
+        CONTENT_LENGTH=str(len(data))
+    )
+    request.GET = QueryDict(query)
+    request.COOKIES = parent.COOKIES
+    request._stream = io.BytesIO(data)
+    request._read_started = False
+    request._force_auth_user = parent.user
+    request._force_auth_token = parent.auth
+    return request
+
+
+def release_response(response):
+    """
+    Libère les ressources d'une sous-réponse (ex: fichier d'une `FileResponse`).
+
+    `response.close()` enverrait aussi le signal `request_finished`, qui fermerait les connexions
+    à la base de la requête `/batch/` encore en cours.
+    """
+    for closer in response._resource_closers:
+        try:
+            closer()
+        except Exception:
+            pass
+    response._resource_closers.clear()
+
+
+def serialize_response(response):
+    if response.streaming:
+        # Un flux (fichier, export) ne peut pas être inclus dans le corps JSON du lot
+        release_response(response)
+        return {'status': 400, 'headers': {}, 'body': {'detail': 'Streaming responses cannot be batched.'}}
+    if hasattr(response, 'data'):
+        # Réponse DRF : les données sont rendues une seule fois, avec la réponse globale
+        body = response.data
+    else:
+        content = response.content.decode(response.charset)
+        try:
+            body = json.loads(content)
+        except ValueError:
+            body = content
+    headers = {name: value for name, value in response.items() if name.lower() not in OMITTED_HEADERS}
+    return {'status': response.status_code, 'headers': headers, 'body': body}
+
+
+def dispatch(parent, method, path, body, primary):
+    """
+    Exécute une sous-requête via le résolveur d'URL, sur le shard du projet concerné.
+
+    À appeler dans une copie du contexte courant : le shard et le choix de la base de lecture
+    ne concernent que cette sous-requête, tandis que l'identity map de la requête `/batch/`
+    (api/cache.py) est partagée par toutes les sous-requêtes.
+    """
+    try:
+        match = resolve(path.partition('?')[0])
+    except Resolver404:
+        return {'status': 404, 'headers': {}, 'body': {'detail': 'Not found.'}}
+    view_class = getattr(match.func, 'cls', None)
+    # Seules les vues DRF savent traiter une requête qui n'a pas traversé les middlewares (ex: admin exclu)
+    if not isinstance(view_class, type) or not issubclass(view_class, APIView):
+        return {'status': 400, 'headers': {}, 'body': {'detail': 'Only API endpoints can be batched.'}}
+    if view_class is getattr(parent.resolver_match.func, 'cls', None):
+        return {'status': 400, 'headers': {}, 'body': {'detail': 'Batch requests cannot be nested.'}}
+
+    use_primary(primary)
+    if shards_enabled() and 'pk' in match.kwargs:
+        try:
+            _current_shard.set(shard_for_project(match.kwargs['pk'], for_write=method not in SAFE_METHODS))
+        except ProjectMoving:
+            return {'status': 503, 'headers': {}, 'body': {'detail': 'Project is being moved, please retry later.'}}
+
+    request = build_request(parent, method, path, body)
+    request.resolver_match = match
+    try:
+        return serialize_response(match.func(request, *match.args, **match.kwargs))
+    except Exception:
+        # Une sous-requête en erreur ne doit pas faire échouer tout le lot
+        logger.exception('Batch sub-request failed: %s %s', method, path)
+        return {'status': 500, 'headers': {}, 'body': {'detail': 'Internal server error.'}}
+
+
+def dispatch_in_thread(context, *args):
+    try:
+        return context.run(dispatch, *args)
+    finally:
+        # Chaque thread a ses propres connexions : je les ferme avant de rendre le thread au pool
+        connections.close_all()
+
+
+def run_batch(parent, specs, parallel=False, pinned=False):
+    """
+    Exécute les sous-requêtes dans l'ordre et retourne (résultats, écriture effectuée).
+
+    Les lectures suivant une écriture du lot sont faites sur la base principale.
+    Avec `parallel`, les lectures consécutives sont exécutées en même temps
+    (au plus `BATCH_MAX_WORKERS` threads) ; les écritures restent séquentielles.
+    """
+    results = []
+    wrote = False
+    index = 0
+    while index < len(specs):
+        method, path, body = specs[index]
+        if method not in SAFE_METHODS:
+            result = contextvars.copy_context().run(dispatch, parent, method, path, body, True)
+            results.append(result)
+            wrote = wrote or result['status'] < 400
+            index += 1
+            continue
+
+        end = index + 1
+        while parallel and end < len(specs) and specs[end][0] in SAFE_METHODS:
+            end += 1
+        group = specs[index:end]
+        primary = pinned or wrote
+        if len(group) == 1:
+            results.append(contextvars.copy_context().run(dispatch, parent, *group[0], primary))
+        else:
+            with ThreadPoolExecutor(max_workers=min(settings.BATCH_MAX_WORKERS, len(group))) as executor:
+                futures = [
+                    executor.submit(dispatch_in_thread, contextvars.copy_context(), parent, *spec, primary)
+                    for spec in group
+                ]
+                results.extend(future.result() for future in futures)
+        index = end
+    return results, wrote
@@ -0,0 +1,180 @@
+import contextvars
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import router
+from django.dispatch import Signal
+from django.shortcuts import get_object_or_404
+
+
+# Envoyé à chaque recherche avec `sender=model`, `pk` et `tier` : niveau qui a fourni l'objet
+# ('request', 'local', 'shared' ou 'database'). Permet de brancher un outil de métriques.
+object_cache_lookup = Signal()
+
+# Identity map de la requête courante (voir ObjectCacheMiddleware)
+_identity_map = contextvars.ContextVar('identity_map', default=None)
+
+TIERS = ('request', 'local', 'shared', 'database')
+
+
+class LocalCache:
+    """
+    Cache LRU en mémoire du processus, avec une durée de vie courte.
+
+    La durée de vie borne le temps pendant lequel un processus peut servir un objet
+    modifié par un autre processus.
+    """
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalCache(settings.OBJECT_CACHE_LOCAL_SIZE, settings.OBJECT_CACHE_LOCAL_TTL)
+
+_stats_lock = threading.Lock()
+_stats = dict.fromkeys(TIERS, 0)
+
+
+def record(model, pk, tier):
+    with _stats_lock:
+        _stats[tier] += 1
+    object_cache_lookup.send(sender=model, pk=pk, tier=tier)
+
+
+def get_stats():
+    """
+    Nombre de recherches servies par chaque niveau depuis le démarrage du processus, et taux de succès.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats['hit_rate'] = (total - stats['database']) / total if total else 0.0
+    return stats
+
+
+def cache_key(model, pk, database=None):
+    # La base fait partie de la clé : avec le sharding, elle identifie le shard du projet
+    database = database or router.db_for_write(model)
+    return f'obj:{database}:{model._meta.label_lower}:{pk}'
+
+
+def detach(instance):
+    # Copie sans les objets liés déjà chargés, qui pourraient être modifiés indépendamment
+    instance = copy.copy(instance)
+    instance._state.fields_cache = {}
+    return instance
+
+
+def get_cached_object_or_404(model, pk):
+    """
+    Équivalent de `get_object_or_404(model, pk=pk)` servi par cache, pour les lectures seulement
+    (voir `get_object_for_update_or_404` pour les écritures).
+
+    L'objet est cherché successivement dans l'identity map de la requête (un objet n'est chargé
+    qu'une fois par requête), dans le cache du processus, dans le cache partagé, puis en base.
+    """
+    key = cache_key(model, pk)
+    identity_map = _identity_map.get()
+    if identity_map is not None and key in identity_map:
+        record(model, pk, 'request')
+        return identity_map[key]
+
+    instance = local_cache.get(key)
+    if instance is not None:
+        record(model, pk, 'local')
+        instance = copy.copy(instance)
+    else:
+        instance = shared_cache.get(key)
+        if instance is not None:
+            record(model, pk, 'shared')
+            local_cache.set(key, detach(instance))
+        else:
+            # Chargé depuis la base principale : un réplica en retard ne doit pas alimenter le cache partagé
+            instance = get_object_or_404(model.objects.using(router.db_for_write(model)), pk=pk)
+            record(model, pk, 'database')
+            store(instance, key)
+
+    if identity_map is not None:
+        identity_map[key] = instance
+    return instance
+
+
+def get_object_for_update_or_404(model, pk):
+    """
+    Charge un objet depuis la base principale, sans passer par le cache, et le verrouille jusqu'à
+    la fin de la transaction courante.
+
+    À utiliser avant de modifier ou de supprimer un objet : une copie en cache peut être périmée,
+    et l'enregistrer recréerait par exemple un objet supprimé entre-temps par un autre processus.
+    Le cache reste réservé aux lectures et aux contrôles d'accès.
+    """
+    database = router.db_for_write(model)
+    return get_object_or_404(model.objects.using(database).select_for_update(), pk=pk)
+
+
+def store(instance, key=None):
+    """
+    Écrit un objet dans le cache du processus et dans le cache partagé (write-through).
+    """
+    key = key or cache_key(type(instance), instance.pk, instance._state.db)
+    value = detach(instance)
+    local_cache.set(key, value)
+    shared_cache.set(key, value, settings.OBJECT_CACHE_TIMEOUT)
+    identity_map = _identity_map.get()
+    if identity_map is not None and key in identity_map:
+        identity_map[key] = instance
+
+
+def invalidate(model, pks, database=None):
+    """
+    Retire des objets des caches, par exemple après un `QuerySet.update()` qui n'envoie pas de signal.
+    """
+    keys = [cache_key(model, pk, database) for pk in pks]
+    identity_map = _identity_map.get()
+    for key in keys:
+        local_cache.delete(key)
+        if identity_map is not None:
+            identity_map.pop(key, None)
+    for start in range(0, len(keys), 1000):
+        shared_cache.delete_many(keys[start:start + 1000])
+
+
+def begin_request():
+    return _identity_map.set({})
+
+
+def end_request(token):
+    _identity_map.reset(token)
@@ -0,0 +1,175 @@
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .cache import LocalCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+
+def gzip_compressor(level):
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+class BrotliCompressor:
+    # Même interface que les compresseurs de zlib : compress() / flush()
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+def zstd_compressor(level):
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+# Encodages disponibles, par ordre de préférence à qualité égale.
+# brotli et zstd ne sont proposés que si les paquets `brotli` et `zstandard` sont installés.
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS['zstd'] = zstd_compressor
+if brotli is not None:
+    ENCODERS['br'] = BrotliCompressor
+ENCODERS['gzip'] = gzip_compressor
+
+
+def parse_accept_encoding(header):
+    """
+    Retourne {encodage: qualité} à partir de l'en-tête `Accept-Encoding`.
+    """
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(header):
+    """
+    Choisit l'encodage à utiliser parmi ceux disponibles, ou None.
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for name in ENCODERS:
+        quality = accepted.get(name, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress(encoding, level, content):
+    compressor = ENCODERS[encoding](level)
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_stream(encoding, level, chunks):
+    compressor = ENCODERS[encoding](level)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def compress_async_stream(encoding, level, chunks):
+    compressor = ENCODERS[encoding](level)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Middleware compressant les réponses selon l'en-tête `Accept-Encoding` (zstd, brotli ou gzip).
+
+    - Seules les réponses JSON/texte d'au moins `COMPRESSION_MIN_SIZE` octets sont compressées.
+    - Le niveau de compression par encodage vient de `COMPRESSION_LEVELS`, et peut être redéfini
+      par une vue avec l'attribut `compression_levels`.
+    - Les réponses en streaming sont compressées au fil de l'eau.
+    - Les octets compressés sont conservés (cache du processus, indexé par l'empreinte du contenu) :
+      une même réponse servie plusieurs fois n'est compressée qu'une seule fois.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cache = LocalCache(settings.COMPRESSION_CACHE_SIZE, settings.COMPRESSION_CACHE_TTL)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+        if not self.should_compress(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is None:
+            return response
+        level = {**settings.COMPRESSION_LEVELS, **getattr(request, 'compression_levels', {})}[encoding]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(encoding, level, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(encoding, level, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            response.content = self.compress_cached(encoding, level, response.content)
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # Le contenu transmis n'est plus identique octet par octet : l'ETag devient faible
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        levels = getattr(view_class, 'compression_levels', None)
+        if levels:
+            request.compression_levels = levels
+
+    def should_compress(self, response):
+        return (
+            response.status_code == 200
+            and not response.has_header('Content-Encoding')
+            and response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+        )
+
+    def compress_cached(self, encoding, level, content):
+        if not settings.COMPRESSION_CACHE_SIZE:
+            return compress(encoding, level, content)
+        key = (encoding, level, hashlib.blake2b(content, digest_size=16).digest())
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = compress(encoding, level, content)
+            self.cache.set(key, compressed)
+        return compressed
@@ -0,0 +1,169 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, identify_hasher, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingPoolSaturated(APIException):
+    """
+    Erreur renvoyée (503) lorsque le pool de hachage est saturé.
+
+    Le client doit réessayer plus tard plutôt que de bloquer un worker en attendant une place.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server busy, please retry later.'
+    default_code = 'hashing_pool_saturated'
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Hasher PBKDF2 dont le coût est défini par `PASSWORD_HASH_ITERATIONS`.
+
+    L'algorithme reste `pbkdf2_sha256` : les mots de passe existants restent valides et sont
+    automatiquement re-hachés à la connexion lorsque le coût change.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+
+def _init_worker():
+    # Nécessaire lorsque les processus sont démarrés en mode "spawn" (Windows, macOS)
+    import django
+    django.setup()
+
+
+class HashingPool:
+    """
+    Pool de processus borné dédié au hachage et à la vérification des mots de passe.
+
+    Le nombre de calculs en cours ou en attente est limité à `workers + queue_size` ;
+    au-delà, `HashingPoolSaturated` est levée immédiatement. Avec `workers = 0`, le calcul
+    est fait dans le thread de la requête (toujours borné).
+    """
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return self._executor
+
+    def _reset_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except RuntimeError:
+            # Pool cassé (BrokenProcessPool) ou arrêté entre-temps par un autre thread :
+            # on libère la place et on recrée le pool à la prochaine demande
+            self._slots.release()
+            self._reset_executor(executor)
+            raise HashingPoolSaturated()
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingPoolSaturated()
+        except BrokenProcessPool:
+            # Un processus du pool a été tué : on recrée le pool à la prochaine demande
+            self._reset_executor(executor)
+            raise HashingPoolSaturated()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                workers=settings.PASSWORD_HASHING_WORKERS,
+                queue_size=settings.PASSWORD_HASHING_QUEUE_SIZE,
+                timeout=settings.PASSWORD_HASHING_TIMEOUT
+            )
+        return _pool
+
+
+def hash_password(password):
+    """
+    Hache un mot de passe dans le pool dédié.
+    """
+    return get_pool().run(make_password, password)
+
+
+def verify_password(password, encoded):
+    """
+    Vérifie un mot de passe dans le pool dédié.
+    """
+    if not encoded:
+        return False
+    return get_pool().run(check_password, password, encoded)
+
+
+def rehash_if_needed(user, password):
+    """
+    Re-hache le mot de passe d'un utilisateur si le hasher ou son coût a changé.
+    """
+    try:
+        must_update = identify_hasher(user.password).must_update(user.password)
+    except ValueError:
+        return
+    if must_update:
+        user.password = hash_password(password)
+        user.save(update_fields=['password'])
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    Backend d'authentification identique à `ModelBackend`, mais dont la vérification
+    du mot de passe est déportée dans le pool de hachage.
+
+    Utilisé par `TokenObtainPairView` (connexion) via `AUTHENTICATION_BACKENDS`.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Comme ModelBackend : on hache quand même pour ne pas révéler
+            # l'existence du compte par le temps de réponse
+            hash_password(password)
+            return None
+        if verify_password(password, user.password) and self.user_can_authenticate(user):
+            rehash_if_needed(user, password)
+            return user
+        return None
@@ -0,0 +1,160 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Case, Count, Exists, F, OuterRef, PositiveIntegerField, Q, Value, When
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from .models import Contributor, InboxCounter, Issue, UserProject
+from .sharding import shards_enabled
+
+
+def encode_cursor(issue):
+    value = f'{issue.created_time.isoformat()}|{issue.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Retourne (date de création, identifiant) du dernier problème de la page précédente.
+
+    Lève `ValueError` si le curseur est invalide.
+    """
+    created_time, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(created_time), int(pk)
+
+
+def inbox_sources(user_id):
+    """
+    Bases à interroger pour la boîte de réception d'un utilisateur, avec les projets auxquels il a accès
+    sur chacune (None : accès vérifié par la requête elle-même, sans sharding).
+    """
+    if not shards_enabled():
+        return [(None, None)]
+    entries = UserProject.objects.using('default').filter(user_id=user_id).values_list('project_id', 'database')
+    by_database = {}
+    for project_id, database in entries:
+        by_database.setdefault(database, []).append(project_id)
+    return list(by_database.items())
+
+
+def open_issues(user_id, database=None, project_ids=None):
+    """
+    Problèmes ouverts assignés à l'utilisateur, dans les projets dont il est l'auteur ou un contributeur.
+
+    Le filtre (assigné, statut) et le tri par date de création utilisent l'index
+    (`assignee`, `status`, `created_time`) de `Issue`.
+    """
+    issues = Issue.objects.using(database).filter(assignee_id=user_id, status__in=Issue.OPEN_STATUSES)
+    if project_ids is not None:
+        return issues.filter(project_id__in=project_ids)
+    return issues.filter(
+        Q(project__author_id=user_id)
+        | Exists(Contributor.objects.filter(project_id=OuterRef('project_id'), user_id=user_id))
+    )
+
+
+def inbox_page(user_id, limit, cursor=None):
+    """
+    Page de la boîte de réception, du problème le plus récent au plus ancien (pagination par curseur).
+
+    Chaque base concernée renvoie au plus `limit + 1` problèmes après le curseur ; les résultats sont
+    fusionnés, et le curseur de la page suivante est renvoyé s'il reste des problèmes.
+    """
+    issues = []
+    for database, project_ids in inbox_sources(user_id):
+        queryset = open_issues(user_id, database, project_ids)
+        if cursor is not None:
+            created_time, pk = cursor
+            queryset = queryset.filter(Q(created_time__lt=created_time) | Q(created_time=created_time, pk__lt=pk))
+        issues.extend(queryset.order_by('-created_time', '-pk')[:limit + 1])
+    issues.sort(key=lambda issue: (issue.created_time, issue.pk), reverse=True)
+    page = issues[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(issues) > limit else None
+    return page, next_cursor
+
+
+def open_counts(user_ids):
+    """
+    Nombre de problèmes ouverts de chaque utilisateur, dans les projets auxquels il a accès
+    (même condition que `open_issues`), en une requête groupée par base.
+    """
+    counts = dict.fromkeys(user_ids, 0)
+    if not shards_enabled():
+        issues = Issue.objects.filter(assignee_id__in=user_ids, status__in=Issue.OPEN_STATUSES).filter(
+            Q(project__author_id=F('assignee_id'))
+            | Exists(Contributor.objects.filter(project_id=OuterRef('project_id'), user_id=OuterRef('assignee_id')))
+        )
+        counts.update(issues.order_by().values('assignee_id').annotate(count=Count('id')).values_list(
+            'assignee_id', 'count'
+        ))
+        return counts
+
+    entries = UserProject.objects.using('default').filter(user_id__in=user_ids).values_list(
+        'user_id', 'project_id', 'database'
+    )
+    members = set()
+    by_database = {}
+    for user_id, project_id, database in entries:
+        members.add((user_id, project_id))
+        by_database.setdefault(database, set()).add(project_id)
+    for database, project_ids in by_database.items():
+        rows = (
+            Issue.objects.using(database)
+            .filter(assignee_id__in=user_ids, status__in=Issue.OPEN_STATUSES, project_id__in=project_ids)
+            .order_by().values('assignee_id', 'project_id').annotate(count=Count('id'))
+            .values_list('assignee_id', 'project_id', 'count')
+        )
+        for user_id, project_id, count in rows:
+            if (user_id, project_id) in members:
+                counts[user_id] += count
+    return counts
+
+
+def recount(user_ids):
+    """
+    Recalcule le nombre de problèmes ouverts des utilisateurs (ex: après un changement de contributeurs,
+    ou un `QuerySet.update()` de l'admin, qui ne passe pas par `Issue.save`).
+    Le nombre de non lus ne peut pas le dépasser.
+
+    Le nombre de requêtes ne dépend pas du nombre d'utilisateurs : un comptage groupé par base,
+    puis une création et une mise à jour en masse des compteurs.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    counts = open_counts(user_ids)
+    counters = InboxCounter.objects.using('default')
+    existing = set(counters.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+    counters.bulk_create(
+        [InboxCounter(user_id=user_id, open_count=counts[user_id]) for user_id in user_ids - existing],
+        ignore_conflicts=True
+    )
+    if existing:
+        by_count = {}
+        for user_id in existing:
+            by_count.setdefault(counts[user_id], []).append(user_id)
+        open_count = Case(
+            *[When(user_id__in=ids, then=Value(count)) for count, ids in by_count.items()],
+            default=F('open_count'),
+            output_field=PositiveIntegerField()
+        )
+        counters.filter(user_id__in=existing).update(
+            open_count=open_count,
+            unread_count=Least(F('unread_count'), open_count)
+        )
+
+
+def get_counts(user_id):
+    counter = InboxCounter.objects.filter(user_id=user_id).first()
+    if counter is None:
+        recount([user_id])
+        counter = InboxCounter.objects.using('default').get(user_id=user_id)
+    return {'open': counter.open_count, 'unread': min(counter.unread_count, counter.open_count)}
+
+
+def mark_read(user_id):
+    if not InboxCounter.objects.filter(user_id=user_id).update(unread_count=0, last_read_time=timezone.now()):
+        recount([user_id])
+        InboxCounter.objects.filter(user_id=user_id).update(unread_count=0, last_read_time=timezone.now())
+    return get_counts(user_id)
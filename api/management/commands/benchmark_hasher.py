@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from api.hashing import HashingPoolSaturated, hash_password
+
+
+class Command(BaseCommand):
+    """
+    Commande mesurant le coût du hachage des mots de passe.
+
+    Affiche le temps d'un hachage pour chaque nombre d'itérations demandé, puis le débit du pool
+    de hachage (avec sa configuration actuelle) sous `--concurrency` requêtes simultanées.
+    """
+    help = "Mesure le coût du hachage des mots de passe et le débit du pool de hachage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, nargs='+',
+            default=[100_000, 260_000, 390_000, settings.PASSWORD_HASH_ITERATIONS]
+        )
+        parser.add_argument('--samples', type=int, default=5)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        salt = hasher.salt()
+        for iterations in sorted(set(options['iterations'])):
+            start = time.perf_counter()
+            for _ in range(options['samples']):
+                hasher.encode('Benchmark1!', salt, iterations)
+            elapsed = (time.perf_counter() - start) / options['samples']
+            self.stdout.write(
+                f'{iterations:>9} iterations: {elapsed * 1000:8.1f} ms/hash, {1 / elapsed:7.1f} hash/s/core'
+            )
+
+        concurrency = options['concurrency']
+
+        def task(_):
+            try:
+                hash_password('Benchmark1!')
+                return True
+            except HashingPoolSaturated:
+                return False
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as threads:
+            results = list(threads.map(task, range(concurrency)))
+        elapsed = time.perf_counter() - start
+        rejected = results.count(False)
+        self.stdout.write(
+            f'Pool ({settings.PASSWORD_HASHING_WORKERS} workers, queue {settings.PASSWORD_HASHING_QUEUE_SIZE}): '
+            f'{concurrency - rejected} hashes in {elapsed:.2f}s, {rejected} rejected (503)'
+        )
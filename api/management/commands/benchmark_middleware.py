@@ -0,0 +1,135 @@
+import json
+import os
+import secrets
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Script exécuté dans un interpréteur neuf pour chaque profil : les réglages sont lus au démarrage
+BENCHMARK_SCRIPT = """
+import io, json, os, statistics, time
+import django
+django.setup()
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+
+application = get_wsgi_application()
+headers = {'HTTP_ACCEPT': os.environ['BENCHMARK_ACCEPT']}
+if os.environ['BENCHMARK_USER']:
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import AccessToken
+    user = User.objects.get(username=os.environ['BENCHMARK_USER'])
+    headers['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+path, _, query = os.environ['BENCHMARK_PATH'].partition('?')
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'SERVER_PROTOCOL': 'HTTP/1.1',
+    'wsgi.url_scheme': 'http', 'wsgi.errors': io.StringIO(), **headers,
+}
+statuses = []
+
+def start_response(status, *args):
+    statuses.append(status)
+
+def call():
+    response = application(dict(environ, **{'wsgi.input': io.BytesIO()}), start_response)
+    b''.join(response)
+    response.close()
+
+for _ in range(int(os.environ['BENCHMARK_WARMUP'])):
+    call()
+durations = []
+for _ in range(int(os.environ['BENCHMARK_REQUESTS'])):
+    start = time.perf_counter()
+    call()
+    durations.append(time.perf_counter() - start)
+durations.sort()
+print(json.dumps({
+    'status': statuses[-1],
+    'debug': settings.DEBUG,
+    'middleware': len(settings.MIDDLEWARE),
+    'mean': statistics.mean(durations),
+    'p50': durations[len(durations) // 2],
+    'p90': durations[int(len(durations) * 0.9)],
+    'queries_retained': len(connection.queries),
+}))
+"""
+
+
+class Command(BaseCommand):
+    """
+    Commande comparant le coût par requête du profil de développement et du profil de production
+    (DEBUG, pile de middlewares, rendus DRF).
+
+    Chaque profil est chargé dans un interpréteur neuf, qui envoie la même requête à l'application WSGI
+    `--requests` fois. Sans `--user`, la requête n'est pas authentifiée (réponse 401) : la mesure porte alors
+    sur les middlewares et DRF, sans accès à la base.
+    """
+    help = "Compare le coût par requête des profils de développement et de production."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/projects/', help="URL de l'API à appeler.")
+        parser.add_argument('--user', default='', help="Nom de l'utilisateur au nom duquel appeler l'API (JWT).")
+        parser.add_argument('--accept', default='application/json', help="Valeur de l'en-tête Accept.")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=200)
+
+    def run_profile(self, env, options):
+        env = dict(
+            env,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'drfprojet10.settings'),
+            DRFPROJET10_PROFILING_SAMPLE_RATE='0',
+            BENCHMARK_PATH=options['path'],
+            BENCHMARK_USER=options['user'],
+            BENCHMARK_ACCEPT=options['accept'],
+            BENCHMARK_REQUESTS=str(options['requests']),
+            BENCHMARK_WARMUP=str(options['warmup']),
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', BENCHMARK_SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode:
+            self.stderr.write(result.stderr)
+            return None
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        base_env = {key: value for key, value in os.environ.items() if key != 'DRFPROJET10_ENV'}
+        profiles = {
+            'development': base_env,
+            'production': dict(
+                base_env,
+                DRFPROJET10_ENV='production',
+                DRFPROJET10_SECRET_KEY=os.environ.get('DRFPROJET10_SECRET_KEY', secrets.token_urlsafe(50)),
+                DRFPROJET10_ALLOWED_HOSTS='localhost',
+            ),
+        }
+        results = {}
+        for name, env in profiles.items():
+            results[name] = self.run_profile(env, options)
+            if results[name] is None:
+                return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"GET {options['path']} x {options['requests']} (Accept: {options['accept']})"
+        ))
+        for name, result in results.items():
+            self.stdout.write(
+                f"  {name:<12} {result['status']:<18} DEBUG={result['debug']!s:<5} "
+                f"{result['middleware']:>2} middlewares  mean {result['mean'] * 1e6:8.1f} us  "
+                f"p50 {result['p50'] * 1e6:8.1f} us  p90 {result['p90'] * 1e6:8.1f} us  "
+                f"{result['queries_retained']} queries kept in memory"
+            )
+        saved = results['development']['mean'] - results['production']['mean']
+        self.stdout.write(
+            f"  Saved per request: {saved * 1e6:.1f} us "
+            f"({saved / results['development']['mean'] * 100:.1f} % of the development profile)"
+        )
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Project
+from api.sharding import choose_shard, move_project
+
+
+class Command(BaseCommand):
+    """
+    Commande déplaçant un projet (et ses contributeurs, problèmes et commentaires) vers un autre shard.
+
+    Avec `--all-unsharded`, tous les projets encore hébergés par la base principale (créés avant
+    l'activation du sharding) sont répartis sur les shards.
+    """
+    help = "Déplace un projet vers un autre shard, ou répartit les projets de la base principale."
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int, nargs='?')
+        parser.add_argument('--to', dest='target', help='Alias du shard cible.')
+        parser.add_argument('--all-unsharded', action='store_true')
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_SHARDS:
+            raise CommandError('No shard configured (see DRFPROJET10_DB_SHARDS).')
+
+        if options['all_unsharded']:
+            project_ids = list(Project.objects.using('default').values_list('pk', flat=True))
+            for project_id in project_ids:
+                self.move(project_id, options['target'] or choose_shard(project_id))
+            return
+
+        if options['project_id'] is None or options['target'] is None:
+            raise CommandError('Usage: move_project <project_id> --to <shard> (or --all-unsharded).')
+        self.move(options['project_id'], options['target'])
+
+    def move(self, project_id, target):
+        if target not in settings.DATABASE_SHARDS and target != 'default':
+            raise CommandError(f'Unknown database "{target}".')
+        source = move_project(project_id, target)
+        self.stdout.write(f'Project {project_id}: {source} -> {target}')
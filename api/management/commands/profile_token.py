@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.profiling import MODES, make_token
+
+
+class Command(BaseCommand):
+    """
+    Commande générant un jeton de profilage à envoyer dans l'en-tête `X-Profile`.
+    """
+    help = "Génère un jeton signé permettant de profiler des requêtes (en-tête X-Profile)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES, default='cprofile')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'X-Profile: {make_token(options["mode"])}')
+        self.stdout.write(f'(valid for {settings.PROFILING_TOKEN_MAX_AGE} seconds)')
@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Commande simulant la réplication en local : copie la base SQLite principale vers chaque réplica.
+
+    La copie utilise l'API de sauvegarde de SQLite, qui produit une image cohérente même si la base
+    principale est en cours d'écriture. Avec `--loop`, la copie est répétée toutes les `--interval`
+    secondes, ce qui reproduit un retard de réplication.
+    """
+    help = "Copie la base SQLite principale vers les réplicas (réplication locale)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Réplique en continu.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Retard de réplication simulé (s).')
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Local replication only supports SQLite databases.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replica configured (see DRFPROJET10_DB_REPLICAS).')
+
+        while True:
+            self.replicate(primary['NAME'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def replicate(self, primary_name):
+        source = sqlite3.connect(primary_name)
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'default -> {alias}')
+        finally:
+            source.close()
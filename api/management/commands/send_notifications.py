@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.notifications import deliver_pending, notification_databases
+
+
+class Command(BaseCommand):
+    """
+    Commande vidant l'outbox des notifications par lots.
+
+    Les outbox de toutes les bases (shards) sont vidées à tour de rôle.
+    Sans `--loop`, la commande s'arrête dès que plus aucun événement n'est prêt à être envoyé.
+    Avec `--loop`, elle tourne en continu comme un worker et attend `--interval` secondes
+    lorsque l'outbox est vide. Une erreur sur une base est affichée sans arrêter le worker.
+    """
+    help = "Envoie les notifications en attente (assignations et commentaires)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.NOTIFICATIONS_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Tourne en continu comme un worker.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Attente (s) lorsque l\'outbox est vide.')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            processed = 0
+            for database in notification_databases():
+                try:
+                    sent, failed = deliver_pending(batch_size=options['batch_size'], using=database)
+                except Exception as error:
+                    # Je garde le worker en vie (ex: base indisponible) : les événements réservés
+                    # redeviennent disponibles à l'expiration de leur bail
+                    self.stderr.write(f'{database}: {error!r}')
+                    continue
+                total_sent += sent
+                total_failed += failed
+                processed += sent + failed
+                if sent or failed:
+                    self.stdout.write(f'{database}: {sent} sent, {failed} failed')
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Done: {total_sent} sent, {total_failed} failed'))
@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+# Script exécuté dans un interpréteur neuf, pour mesurer un démarrage à froid
+PROFILE_SCRIPT = """
+import json, os, time
+t0 = time.perf_counter()
+import django
+# Import explicite : les modules chargés par importlib.import_module() n'apparaissent pas dans -X importtime
+__import__(os.environ['DJANGO_SETTINGS_MODULE'])
+t1 = time.perf_counter()
+django.setup()
+t2 = time.perf_counter()
+import drfprojet10.urls
+import api.views
+t3 = time.perf_counter()
+from api.warmup import warmup
+timings = warmup()
+t4 = time.perf_counter()
+print(json.dumps({
+    'phases': {'settings': t1 - t0, 'django.setup()': t2 - t1, 'urls + views': t3 - t2, 'warmup': t4 - t3},
+    'warmup': timings,
+}))
+"""
+
+TARGETS = [os.environ.get('DJANGO_SETTINGS_MODULE', 'drfprojet10.settings'), 'drfprojet10.urls', 'api.views']
+
+
+def parse_importtime(output):
+    """
+    Analyse la sortie de `python -X importtime` : {module: (self_us, cumulative_us)}.
+    """
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+class Command(BaseCommand):
+    """
+    Commande profilant le démarrage à froid d'un worker.
+
+    Un interpréteur neuf est lancé avec `-X importtime` : la commande affiche le temps d'import
+    (cumulé) de `drfprojet10.settings`, `drfprojet10.urls` et `api.views`, les modules les plus
+    coûteux, ainsi que la durée de chaque phase du démarrage et du préchargement.
+    """
+    help = "Mesure le temps d'import des modules et des phases du démarrage d'un worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Nombre de modules les plus coûteux à afficher.')
+        parser.add_argument('--api-only', action='store_true', help='Profile le mode API seule.')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'drfprojet10.settings'))
+        if options['api_only']:
+            env['DRFPROJET10_API_ONLY'] = '1'
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode:
+            self.stderr.write(result.stderr)
+            return
+
+        modules = parse_importtime(result.stderr)
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Import time (cumulative)'))
+        for target in TARGETS:
+            self_us, cumulative_us = modules.get(target, (0, 0))
+            self.stdout.write(f'  {target:<40} {cumulative_us / 1000:8.1f} ms')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Top {options["top"]} modules (self time)'))
+        heaviest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:options['top']]
+        for name, (self_us, cumulative_us) in heaviest:
+            self.stdout.write(f'  {name:<40} {self_us / 1000:8.1f} ms (cumulative {cumulative_us / 1000:.1f} ms)')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Startup phases'))
+        for name, elapsed in report['phases'].items():
+            self.stdout.write(f'  {name:<40} {elapsed * 1000:8.1f} ms')
+        for name, elapsed in report['warmup'].items():
+            self.stdout.write(f'    warmup.{name:<33} {elapsed * 1000:8.1f} ms')
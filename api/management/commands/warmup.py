@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.warmup import warmup
+
+
+class Command(BaseCommand):
+    """
+    Commande exécutant le préchargement d'un worker et affichant la durée de chaque étape.
+    """
+    help = "Précharge les URLs, les sérialiseurs, les clés JWT et les connexions aux bases de données."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-db', action='store_true', help='Ne pas ouvrir les connexions aux bases de données.')
+
+    def handle(self, *args, **options):
+        timings = warmup(connect_db=not options['no_db'])
+        for name, elapsed in timings.items():
+            self.stdout.write(f'{name:<12} {elapsed * 1000:8.1f} ms')
@@ -0,0 +1,162 @@
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.exception import convert_exception_to_response
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+from .cache import begin_request, end_request
+from .routers import _current_shard, reset_primary, use_primary
+from .sharding import ProjectMoving, shard_for_project, shards_enabled
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware choisissant la base de lecture de chaque requête.
+
+    Les requêtes en lecture (GET, HEAD, OPTIONS) sont servies par les réplicas, sauf si le client
+    a écrit il y a moins de `READ_YOUR_WRITES_SECONDS` secondes : il reste alors "épinglé" sur la base
+    principale afin de toujours voir ses propres modifications malgré le retard de réplication.
+
+    Après une écriture réussie, un jeton signé et horodaté est renvoyé à la fois dans un cookie
+    et dans l'en-tête `X-Primary-Pin` (pour les clients sans cookies, qui doivent le renvoyer
+    dans le même en-tête).
+    """
+    cookie_name = 'primary_pin'
+    header_name = 'X-Primary-Pin'
+    salt = 'api.middleware.ReadYourWritesMiddleware'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.signer = signing.TimestampSigner(salt=self.salt)
+
+    def is_pinned(self, request):
+        value = request.COOKIES.get(self.cookie_name) or request.headers.get(self.header_name)
+        if not value:
+            return False
+        try:
+            self.signer.unsign(value, max_age=settings.READ_YOUR_WRITES_SECONDS)
+        except signing.BadSignature:
+            return False
+        return True
+
+    def __call__(self, request):
+        is_write = request.method not in SAFE_METHODS
+        # Conservé pour les sous-requêtes de `/batch/`, qui choisissent leur base une par une
+        request.primary_pinned = self.is_pinned(request)
+        token = use_primary(is_write or request.primary_pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_primary(token)
+
+        # Une requête `/batch/` ne contenant que des lectures n'épingle pas le client
+        if getattr(request, 'batch_wrote', is_write) and response.status_code < 400:
+            pin = self.signer.sign('primary')
+            response.set_cookie(
+                self.cookie_name,
+                pin,
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+            response[self.header_name] = pin
+        return response
+
+
+class ProjectShardMiddleware:
+    """
+    Middleware dirigeant chaque requête vers le shard du projet désigné par l'argument `pk` de l'URL.
+
+    Toutes les routes `projects/<int:pk>/...` sont ainsi servies par la base qui héberge le projet,
+    sans que les vues n'aient à s'en préoccuper. Pendant le déplacement d'un projet,
+    les écritures sont refusées (503).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        token = getattr(request, '_shard_token', None)
+        if token is not None:
+            _current_shard.reset(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not shards_enabled() or 'pk' not in view_kwargs:
+            return None
+        try:
+            database = shard_for_project(view_kwargs['pk'], for_write=request.method not in SAFE_METHODS)
+        except ProjectMoving:
+            return JsonResponse({'detail': 'Project is being moved, please retry later.'}, status=503)
+        request._shard_token = _current_shard.set(database)
+        return None
+
+
+class ObjectCacheMiddleware:
+    """
+    Middleware ouvrant une identity map pour la durée de la requête : un même objet
+    (projet, problème, commentaire) n'y est chargé qu'une seule fois (voir api/cache.py).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = begin_request()
+        try:
+            return self.get_response(request)
+        finally:
+            end_request(token)
+
+
+class AdminMiddlewareStack:
+    """
+    Middleware exécutant les middlewares de `ADMIN_MIDDLEWARE` (sessions, CSRF, messages...)
+    pour les seules requêtes dont l'URL commence par `ADMIN_URL_PREFIX`.
+
+    Les requêtes de l'API, authentifiées par JWT, ne passent ainsi ni par les sessions ni par les messages.
+    Les méthodes `process_view` et `process_exception` des middlewares de l'admin (dont la vérification CSRF)
+    sont appelées comme si ces middlewares faisaient partie de `MIDDLEWARE`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.ADMIN_URL_PREFIX
+        self.view_middleware = []
+        self.exception_middleware = []
+        handler = get_response
+        for path in reversed(settings.ADMIN_MIDDLEWARE):
+            middleware = import_string(path)(handler)
+            if hasattr(middleware, 'process_view'):
+                self.view_middleware.insert(0, middleware.process_view)
+            if hasattr(middleware, 'process_exception'):
+                self.exception_middleware.append(middleware.process_exception)
+            handler = convert_exception_to_response(middleware)
+        self.admin_handler = handler
+
+    def is_admin(self, request):
+        return request.path_info.startswith(self.prefix)
+
+    def __call__(self, request):
+        if self.is_admin(request):
+            return self.admin_handler(request)
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.is_admin(request):
+            return None
+        for process_view in self.view_middleware:
+            response = process_view(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        if not self.is_admin(request):
+            return None
+        for process_exception in self.exception_middleware:
+            response = process_exception(request, exception)
+            if response is not None:
+                return response
+        return None
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_sharding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='issue',
+            name='priority',
+            field=models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High')], db_index=True, max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='issue',
+            name='status',
+            field=models.CharField(choices=[('TODO', 'To do'), ('ONGOING', 'Ongoing'), ('DONE', 'Done')], db_index=True, max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='issue',
+            name='tag',
+            field=models.CharField(choices=[('BUG', 'Bug'), ('TASK', 'Task'), ('ENHANCEMENT', 'Enhancement')], db_index=True, max_length=15),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_transitions(apps, schema_editor):
+    # L'historique antérieur est inconnu : chaque problème existant reçoit une transition
+    # vers son statut actuel, datée de sa création.
+    Issue = apps.get_model('api', 'Issue')
+    IssueStatusTransition = apps.get_model('api', 'IssueStatusTransition')
+    using = schema_editor.connection.alias
+    issues = Issue.objects.using(using).order_by('pk').values_list('pk', 'project_id', 'status', 'created_time')
+    transitions = (
+        IssueStatusTransition(issue_id=pk, project_id=project_id, to_status=status, created_time=created_time)
+        for pk, project_id, status, created_time in issues.iterator(chunk_size=2000)
+    )
+    batch = []
+    for transition in transitions:
+        batch.append(transition)
+        if len(batch) == 2000:
+            IssueStatusTransition.objects.using(using).bulk_create(batch)
+            batch = []
+    IssueStatusTransition.objects.using(using).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_issue_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('TODO', 'To do'), ('ONGOING', 'Ongoing'), ('DONE', 'Done')], max_length=10, null=True)),
+                ('to_status', models.CharField(choices=[('TODO', 'To do'), ('ONGOING', 'Ongoing'), ('DONE', 'Done')], max_length=10)),
+                ('created_time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='api.issue')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='api.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'created_time'], name='api_issuest_project_4d3b3b_idx'), models.Index(fields=['issue', 'to_status', 'created_time'], name='api_issuest_issue_i_899bd5_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_transitions, migrations.RunPython.noop),
+    ]
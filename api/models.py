@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 # Create your models here.
@@ -26,20 +29,96 @@ class Issue(models.Model):
     PRIORITY_CHOICES = [('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High')]
     TAG_CHOICES = [('BUG', 'Bug'), ('TASK', 'Task'), ('ENHANCEMENT', 'Enhancement')]
     STATUS_CHOICES = [('TODO', 'To do'), ('ONGOING', 'Ongoing'), ('DONE', 'Done')]
+    OPEN_STATUSES = ('TODO', 'ONGOING')
     title = models.CharField(max_length=200)
     description = models.TextField()
     assignee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assigned_issues', null=True, blank=True)
-    priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES)
-    tag = models.CharField(max_length=15, choices=TAG_CHOICES)
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, db_index=True)
+    tag = models.CharField(max_length=15, choices=TAG_CHOICES, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, db_index=True)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='issues')
     created_time = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='authored_issues')
 
+    class Meta:
+        # Boîte de réception : problèmes ouverts d'un assigné, du plus récent au plus ancien
+        indexes = [models.Index(fields=['assignee', 'status', 'created_time'])]
+
+    # Champs dont les changements sont détectés à l'enregistrement (historique des statuts, boîte de réception)
+    TRACKED_FIELDS = ('status', 'assignee_id')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Je garde le statut et l'assigné chargés (sauf s'ils sont différés) afin de détecter leurs changements
+        instance._loaded = {name: instance.__dict__[name] for name in cls.TRACKED_FIELDS if name in instance.__dict__}
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        # Les valeurs rechargées (y compris un champ différé lu à la demande) deviennent la référence
+        attnames = None if fields is None else {self._meta.get_field(name).attname for name in fields}
+        loaded = getattr(self, '_loaded', {})
+        for name in self.TRACKED_FIELDS:
+            if (attnames is None or name in attnames) and name in self.__dict__:
+                loaded[name] = self.__dict__[name]
+        self._loaded = loaded
+
+    def loaded_values(self, using):
+        """
+        Statut et assigné tels qu'en base avant l'enregistrement. Un champ différé lors du chargement,
+        puis modifié sans avoir été lu, est relu en base.
+        """
+        loaded = getattr(self, '_loaded', {})
+        if all(name in loaded for name in self.TRACKED_FIELDS):
+            return loaded
+        current = Issue.objects.using(using).filter(pk=self.pk).values(*self.TRACKED_FIELDS).first() or {}
+        return {**current, **loaded}
+
     def save(self, *args, **kwargs):
         if self.assignee is None:
             self.assignee = self.author
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        using = kwargs.get('using') or router.db_for_write(Issue, instance=self)
+        previous = {} if adding else self.loaded_values(using)
+        previous_status = previous.get('status')
+        previous_assignee_id = previous.get('assignee_id')
+        # Chaque changement de statut est historisé dans la même transaction que le problème
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if adding or self.status != previous_status:
+                IssueStatusTransition.objects.using(self._state.db).create(
+                    issue=self,
+                    project_id=self.project_id,
+                    from_status=None if adding else previous_status,
+                    to_status=self.status
+                )
+            self.update_inbox_counters(adding, previous_assignee_id, previous_status)
+        self._loaded = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+
+    def can_access(self, user_id):
+        """
+        Même condition que la boîte de réception (api/inbox.py) : l'utilisateur est l'auteur du projet
+        ou un de ses contributeurs.
+        """
+        return Project.objects.using(self._state.db).filter(pk=self.project_id).filter(
+            Q(author_id=user_id) | Q(contributors__user_id=user_id)
+        ).exists()
+
+    def update_inbox_counters(self, adding, previous_assignee_id, previous_status):
+        was_open = not adding and previous_assignee_id is not None and previous_status in self.OPEN_STATUSES
+        is_open = self.assignee_id is not None and self.status in self.OPEN_STATUSES
+        if was_open and is_open and previous_assignee_id == self.assignee_id:
+            return
+        # Un problème d'un projet inaccessible à l'assigné n'est pas compté
+        was_open = was_open and self.can_access(previous_assignee_id)
+        is_open = is_open and self.can_access(self.assignee_id)
+        if was_open:
+            InboxCounter.objects.adjust(previous_assignee_id, open_delta=-1)
+        if is_open:
+            # Un problème que l'on s'assigne soi-même n'est pas "non lu"
+            unread = self.assignee_id != previous_assignee_id and self.assignee_id != self.author_id
+            InboxCounter.objects.adjust(self.assignee_id, open_delta=1, unread_delta=int(unread))
 
     def __str__(self):
         return self.title
@@ -53,3 +132,134 @@ class Comment(models.Model):
 
     def __str__(self):
         return f'{self.author.username} - {self.description}'
+
+
+class IssueStatusTransition(models.Model):
+    """
+    Historique des statuts des problèmes : une ligne par changement de statut (y compris à la création).
+
+    La table n'est jamais modifiée, seulement complétée ; elle sert au calcul des rapports
+    de débit, de temps de cycle et de travail en cours (voir api/reports.py).
+    """
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='status_transitions')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='status_transitions')
+    from_status = models.CharField(max_length=10, choices=Issue.STATUS_CHOICES, null=True, blank=True)
+    to_status = models.CharField(max_length=10, choices=Issue.STATUS_CHOICES)
+    created_time = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'created_time']),
+            models.Index(fields=['issue', 'to_status', 'created_time']),
+        ]
+
+    def __str__(self):
+        return f'{self.issue_id} - {self.from_status} -> {self.to_status}'
+
+
+class InboxCounterManager(models.Manager):
+    def adjust(self, user_id, open_delta=0, unread_delta=0):
+        """
+        Met à jour les compteurs d'un utilisateur en une requête (`F()`), sans les lire.
+
+        Sans ligne pour l'utilisateur, les compteurs sont d'abord calculés depuis les problèmes
+        (le nombre d'ouverts inclut alors déjà le changement en cours), puis seul le nombre de non lus
+        est ajusté : une assignation antérieure à la première consultation reste "non lue".
+        """
+        updated = self.filter(user_id=user_id).update(
+            open_count=Greatest(F('open_count') + open_delta, 0),
+            unread_count=Greatest(F('unread_count') + unread_delta, 0)
+        )
+        if not updated:
+            # Import local : api/inbox.py dépend de ce module
+            from .inbox import recount
+            recount([user_id])
+            updated = self.filter(user_id=user_id).update(unread_count=Greatest(F('unread_count') + unread_delta, 0))
+        return updated
+
+
+class InboxCounter(models.Model):
+    """
+    Compteurs de la boîte de réception d'un utilisateur : problèmes ouverts qui lui sont assignés
+    et problèmes assignés depuis sa dernière lecture. Stocké sur la base principale.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='inbox_counter')
+    open_count = models.PositiveIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_time = models.DateTimeField(null=True, blank=True)
+
+    objects = InboxCounterManager()
+
+    def __str__(self):
+        return f'{self.user_id} - {self.open_count} ({self.unread_count})'
+
+
+class Notification(models.Model):
+    """
+    Événement de notification en attente d'envoi (outbox transactionnelle).
+
+    Les événements sont écrits dans la même transaction que la modification qui les déclenche,
+    puis envoyés par lots par la commande `send_notifications`.
+    """
+    KIND_CHOICES = [('ASSIGNMENT', 'Assignment'), ('COMMENT', 'Comment')]
+    STATUS_CHOICES = [('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed')]
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=15, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_time = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_time = models.DateTimeField(auto_now_add=True)
+    sent_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_time'])]
+
+    def __str__(self):
+        return f'{self.kind} - {self.recipient_id}'
+
+
+class ProjectShard(models.Model):
+    """
+    Annuaire des projets : base de données (shard) hébergeant chaque projet.
+
+    Stocké sur la base principale. Un projet absent de l'annuaire est hébergé par la base principale.
+    Pendant un déplacement, `locked` empêche les écritures sur le projet.
+    """
+    project_id = models.BigIntegerField(primary_key=True)
+    database = models.CharField(max_length=100, db_index=True)
+    locked = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f'{self.project_id} - {self.database}'
+
+
+class UserProject(models.Model):
+    """
+    Index utilisateur → projets (auteur ou contributeur), stocké sur la base principale.
+
+    Permet de savoir sur quels shards se trouvent les projets d'un utilisateur sans tous les interroger.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='project_index')
+    project_id = models.BigIntegerField()
+    database = models.CharField(max_length=100)
+    is_author = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'project_id'], name='unique_user_project')]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.project_id}'
+
+
+class IdSequence(models.Model):
+    """
+    Séquence d'identifiants globale (base principale), utilisée pour que les identifiants
+    des objets répartis sur plusieurs shards restent uniques.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    next_value = models.BigIntegerField()
+
+    def __str__(self):
+        return f'{self.name} - {self.next_value}'
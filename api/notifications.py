@@ -0,0 +1,242 @@
+import json
+import urllib.request
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+
+class PermanentDeliveryError(Exception):
+    """
+    Erreur d'envoi qu'il est inutile de retenter (ex: destinataire sans adresse e-mail).
+    """
+
+
+def notify_assignment(issue, actor):
+    """
+    Enregistre une notification pour l'assigné d'un problème.
+
+    Doit être appelée dans la transaction qui enregistre l'assignation.
+    Aucun événement n'est créé lorsque l'utilisateur s'assigne lui-même le problème.
+    """
+    if issue.assignee_id is None or issue.assignee_id == actor.id:
+        return None
+    return Notification.objects.create(
+        recipient_id=issue.assignee_id,
+        kind='ASSIGNMENT',
+        payload={
+            'project': issue.project_id,
+            'issue': issue.id,
+            'title': issue.title,
+            'actor': actor.username,
+        }
+    )
+
+
+def notify_comment(comment, actor):
+    """
+    Enregistre une notification pour l'assigné du problème commenté.
+
+    Doit être appelée dans la transaction qui enregistre le commentaire.
+    """
+    issue = comment.issue
+    if issue.assignee_id is None or issue.assignee_id == actor.id:
+        return None
+    return Notification.objects.create(
+        recipient_id=issue.assignee_id,
+        kind='COMMENT',
+        payload={
+            'project': issue.project_id,
+            'issue': issue.id,
+            'title': issue.title,
+            'comment': comment.id,
+            'actor': actor.username,
+        }
+    )
+
+
+def retry_delay(attempts):
+    """
+    Délai avant la prochaine tentative (backoff exponentiel borné).
+    """
+    delay = settings.NOTIFICATIONS_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.NOTIFICATIONS_RETRY_MAX_SECONDS))
+
+
+def render_digest(recipient, notifications):
+    """
+    Regroupe les événements d'un destinataire en un seul résumé (sujet, corps).
+    """
+    lines = []
+    for notification in notifications:
+        payload = notification.payload
+        if notification.kind == 'ASSIGNMENT':
+            lines.append(f"- {payload['actor']} vous a assigné le problème \"{payload['title']}\" "
+                         f"(projet {payload['project']}, problème {payload['issue']})")
+        else:
+            lines.append(f"- {payload['actor']} a commenté le problème \"{payload['title']}\" "
+                         f"(projet {payload['project']}, problème {payload['issue']})")
+    subject = f'SoftDesk : {len(notifications)} nouvelle(s) notification(s)'
+    body = f'Bonjour {recipient.username},\n\n' + '\n'.join(lines) + '\n'
+    return subject, body
+
+
+class EmailTransport:
+    """
+    Envoi des résumés via le backend e-mail de Django (`EMAIL_BACKEND`).
+
+    Une seule connexion est ouverte pour tout le lot.
+    """
+    def __init__(self):
+        self.connection = get_connection()
+
+    def __enter__(self):
+        self.connection.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connection.close()
+
+    def send(self, recipient, notifications):
+        if not recipient.email:
+            raise PermanentDeliveryError('Recipient has no email address.')
+        subject, body = render_digest(recipient, notifications)
+        message = EmailMessage(
+            subject,
+            body,
+            settings.DEFAULT_FROM_EMAIL,
+            [recipient.email],
+            connection=self.connection
+        )
+        message.send()
+
+
+class WebhookTransport:
+    """
+    Envoi des résumés en JSON (POST) vers `NOTIFICATIONS_WEBHOOK_URL`.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def send(self, recipient, notifications):
+        data = json.dumps({
+            'recipient': recipient.id,
+            'username': recipient.username,
+            'events': [
+                {'id': notification.id, 'kind': notification.kind, **notification.payload}
+                for notification in notifications
+            ],
+        }).encode()
+        request = urllib.request.Request(
+            settings.NOTIFICATIONS_WEBHOOK_URL,
+            data=data,
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=settings.NOTIFICATIONS_WEBHOOK_TIMEOUT):
+            pass
+
+
+TRANSPORTS = {
+    'email': EmailTransport,
+    'webhook': WebhookTransport,
+}
+
+
+def notification_databases():
+    """
+    Bases contenant une outbox : la base principale et chaque shard
+    (les notifications sont écrites sur la base du projet concerné).
+    """
+    return ['default', *settings.DATABASE_SHARDS]
+
+
+def claim_batch(batch_size, now, using='default'):
+    """
+    Réserve un lot d'événements à envoyer.
+
+    Les événements réservés sont repoussés de `NOTIFICATIONS_LEASE_SECONDS` afin qu'un autre worker
+    ne les prenne pas pendant l'envoi ; si le worker s'arrête, ils redeviennent disponibles à l'expiration.
+    """
+    with transaction.atomic(using=using):
+        batch = list(
+            Notification.objects.using(using).select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_time__lte=now)
+            .select_related('recipient')
+            .order_by('id')[:batch_size]
+        )
+        if batch:
+            claimed_ids = [notification.pk for notification in batch]
+            Notification.objects.using(using).filter(pk__in=claimed_ids).update(
+                next_attempt_time=now + timedelta(seconds=settings.NOTIFICATIONS_LEASE_SECONDS)
+            )
+    return batch
+
+
+def record_failure(notifications, error, now, permanent=False, using='default'):
+    for notification in notifications:
+        notification.attempts += 1
+        notification.last_error = str(error)
+        if permanent or notification.attempts >= settings.NOTIFICATIONS_MAX_ATTEMPTS:
+            notification.status = 'FAILED'
+        else:
+            notification.next_attempt_time = now + retry_delay(notification.attempts)
+    Notification.objects.using(using).bulk_update(
+        notifications,
+        ['attempts', 'last_error', 'status', 'next_attempt_time']
+    )
+
+
+def deliver_pending(batch_size=None, transport=None, using='default'):
+    """
+    Envoie un lot d'événements en attente de la base `using`, regroupés en un résumé par destinataire.
+
+    Retourne un tuple (nombre d'événements envoyés, nombre d'événements en échec).
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_BATCH_SIZE
+    now = timezone.now()
+    batch = claim_batch(batch_size, now, using=using)
+    if not batch:
+        return 0, 0
+
+    by_recipient = defaultdict(list)
+    for notification in batch:
+        by_recipient[notification.recipient].append(notification)
+
+    sent_ids = []
+    failed = 0
+    remaining = dict(by_recipient)
+    try:
+        transport = transport or TRANSPORTS[settings.NOTIFICATIONS_TRANSPORT]()
+        with transport:
+            for recipient, notifications in by_recipient.items():
+                try:
+                    transport.send(recipient, notifications)
+                except PermanentDeliveryError as error:
+                    record_failure(notifications, error, now, permanent=True, using=using)
+                    failed += len(notifications)
+                except Exception as error:
+                    record_failure(notifications, error, now, using=using)
+                    failed += len(notifications)
+                else:
+                    sent_ids.extend(notification.pk for notification in notifications)
+                del remaining[recipient]
+    except Exception as error:
+        # Ouverture (ou fermeture) de la connexion impossible : les événements non traités du lot
+        # comptent une tentative et sont retentés avec backoff, au lieu d'attendre l'expiration du bail
+        unsent = [notification for notifications in remaining.values() for notification in notifications]
+        if unsent:
+            record_failure(unsent, error, now, using=using)
+            failed += len(unsent)
+
+    if sent_ids:
+        Notification.objects.using(using).filter(pk__in=sent_ids).update(status='SENT', sent_time=timezone.now())
+    return len(sent_ids), failed
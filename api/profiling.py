@@ -0,0 +1,217 @@
+import cProfile
+import io
+import json
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+
+MODES = ('cprofile', 'sampling')
+SIGNING_SALT = 'api.profiling'
+
+
+def make_token(mode='cprofile'):
+    """
+    Jeton à envoyer dans l'en-tête `X-Profile` pour profiler une requête (voir la commande `profile_token`).
+    """
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(mode)
+
+
+def read_token(value):
+    try:
+        mode = signing.TimestampSigner(salt=SIGNING_SALT).unsign(value, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return mode if mode in MODES else None
+
+
+class SQLRecorder:
+    """
+    Enregistre les requêtes SQL exécutées, leur durée et la partie du code du projet qui les a déclenchées.
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'database': context['connection'].alias,
+                'sql': sql,
+                'duration_ms': (time.perf_counter() - start) * 1000,
+                'origin': self.origin(),
+            })
+
+    def origin(self):
+        base_dir = str(settings.BASE_DIR)
+        return [
+            f'{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}'
+            for frame in traceback.extract_stack()[:-2]
+            if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename
+        ][-5:]
+
+
+class StackSampler(threading.Thread):
+    """
+    Profileur par échantillonnage : relève la pile du thread de la requête à intervalle régulier.
+
+    Le résultat est au format "collapsed stacks" (une pile par ligne, suivie du nombre d'échantillons),
+    directement exploitable par flamegraph.pl ou speedscope.
+    """
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def profile_name(request):
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    return f'{timestamp}-{request.method}-{slug[:60]}-{uuid.uuid4().hex[:8]}'
+
+
+def prune_profiles():
+    directory = settings.PROFILING_DIR
+    reports = sorted(directory.glob('*.json'))
+    for report in reports[:max(len(reports) - settings.PROFILING_MAX_FILES, 0)]:
+        for path in directory.glob(f'{report.stem}.*'):
+            path.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Middleware profilant une requête à la demande.
+
+    Une requête est profilée si elle porte un jeton signé valide dans l'en-tête `X-Profile`
+    (généré par `python manage.py profile_token`), ou au hasard selon `PROFILING_SAMPLE_RATE`.
+    Elle est alors exécutée sous cProfile (fichier `.prof`, lisible avec pstats, snakeviz ou
+    flameprof) ou sous le profileur par échantillonnage (fichier `.folded` pour un flamegraph),
+    et les requêtes SQL sont enregistrées avec leur origine dans le code (fichier `.json`).
+    Les résultats sont écrits dans `PROFILING_DIR` et consultables via `/profiles/`.
+
+    Les requêtes non profilées ne coûtent qu'une lecture d'en-tête.
+    """
+    header = 'X-Profile'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        token = request.headers.get(self.header)
+        if token is not None:
+            mode = read_token(token)
+        elif self.sample_rate and random.random() < self.sample_rate:
+            mode = settings.PROFILING_SAMPLE_MODE
+        else:
+            mode = None
+        if mode is None:
+            return self.get_response(request)
+        return self.profile(request, mode)
+
+    def profile(self, request, mode):
+        recorder = SQLRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            if mode == 'cprofile':
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            else:
+                profiler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLING_INTERVAL)
+                profiler.start()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.stop()
+        duration = time.perf_counter() - start
+
+        name = profile_name(request)
+        directory = settings.PROFILING_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        if mode == 'cprofile':
+            profiler.dump_stats(directory / f'{name}.prof')
+        else:
+            (directory / f'{name}.folded').write_text(profiler.collapsed())
+        report = {
+            'name': name,
+            'mode': mode,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': duration * 1000,
+            'created_time': datetime.now(timezone.utc).isoformat(),
+            'sql_count': len(recorder.queries),
+            'sql_duration_ms': sum(query['duration_ms'] for query in recorder.queries),
+            'sql': recorder.queries,
+        }
+        (directory / f'{name}.json').write_text(json.dumps(report, indent=2))
+        prune_profiles()
+        response['X-Profile-Id'] = name
+        return response
+
+
+def load_report(name):
+    """
+    Retourne le rapport d'un profil (avec un résumé pstats pour cProfile), ou None s'il n'existe pas.
+    """
+    if not re.fullmatch(r'[A-Za-z0-9-]+', name):
+        return None
+    path = settings.PROFILING_DIR / f'{name}.json'
+    if not path.exists():
+        return None
+    report = json.loads(path.read_text())
+    if report['mode'] == 'cprofile':
+        output = io.StringIO()
+        stats = pstats.Stats(str(settings.PROFILING_DIR / f'{name}.prof'), stream=output)
+        stats.sort_stats('cumulative').print_stats(40)
+        report['summary'] = output.getvalue()
+    return report
+
+
+def list_reports():
+    reports = []
+    for path in sorted(settings.PROFILING_DIR.glob('*.json'), reverse=True):
+        report = json.loads(path.read_text())
+        report.pop('sql')
+        reports.append(report)
+    return reports
@@ -0,0 +1,189 @@
+from datetime import datetime, time, timedelta
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import router
+from django.db.models import Case, Count, DurationField, ExpressionWrapper, F, OuterRef, Subquery, Sum, When, Window
+from django.db.models.functions import CumeDist, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import IssueStatusTransition
+
+
+PERIODS = {'week': TruncWeek, 'month': TruncMonth}
+PERCENTILES = (50, 85, 95)
+
+# +1 lorsqu'un problème passe à ONGOING, -1 lorsqu'il en sort
+WIP_DELTA = (
+    Case(When(to_status='ONGOING', then=1), default=0)
+    - Case(When(from_status='ONGOING', then=1), default=0)
+)
+
+
+def period_start(period, day):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def next_period(period, start):
+    if period == 'week':
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def period_count(period, start, end):
+    """
+    Nombre de périodes couvrant les dates `start` à `end` incluses, calculé sans les énumérer.
+    """
+    if period == 'week':
+        return (end - period_start(period, start)).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def period_starts(period, start, end):
+    """
+    Débuts des périodes couvrant les dates `start` à `end` incluses.
+    """
+    current = period_start(period, start)
+    starts = []
+    while current <= end:
+        starts.append(current)
+        current = next_period(period, current)
+    return starts
+
+
+def as_datetime(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def as_date(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def percentiles(cycle_times):
+    """
+    Percentiles à partir des lignes (durée, rang cumulé CUME_DIST) triées par durée.
+    """
+    values = {}
+    for percentile in PERCENTILES:
+        value = next((duration for duration, rank in cycle_times if rank >= percentile / 100), None)
+        values[f'p{percentile}'] = round(value.total_seconds() / 3600, 2) if value is not None else None
+    return values
+
+
+def compute_report(project_id, period, start, end):
+    """
+    Calcule, pour chaque période entre les dates `start` (incluse) et `end` (exclue), début de période :
+    - `throughput` : nombre de problèmes passés à DONE ;
+    - `cycle_time_hours` : percentiles du temps entre le premier passage à ONGOING et le passage à DONE
+      (rang calculé par la base avec CUME_DIST) ;
+    - `wip` : nombre de problèmes ONGOING à la fin de la période (somme cumulée des entrées et sorties).
+    """
+    trunc = PERIODS[period]('created_time')
+    transitions = IssueStatusTransition.objects.filter(project_id=project_id).order_by()
+    in_range = transitions.filter(created_time__gte=as_datetime(start), created_time__lt=as_datetime(end))
+
+    throughput = {
+        as_date(period_value): count
+        for period_value, count in in_range.filter(to_status='DONE').annotate(period=trunc)
+        .values('period').annotate(count=Count('id')).values_list('period', 'count')
+    }
+
+    started = (
+        IssueStatusTransition.objects
+        .filter(issue=OuterRef('issue'), to_status='ONGOING', created_time__lte=OuterRef('created_time'))
+        .order_by('created_time').values('created_time')[:1]
+    )
+    cycle_times = {}
+    rows = (
+        in_range.filter(to_status='DONE')
+        .annotate(started=Subquery(started))
+        .filter(started__isnull=False)
+        .annotate(
+            period=trunc,
+            cycle_time=ExpressionWrapper(F('created_time') - F('started'), output_field=DurationField())
+        )
+        .annotate(rank=Window(CumeDist(), partition_by=[F('period')], order_by=F('cycle_time').asc()))
+        .values_list('period', 'cycle_time', 'rank')
+    )
+    for period_value, cycle_time, rank in rows:
+        cycle_times.setdefault(as_date(period_value), []).append((cycle_time, rank))
+
+    # Travail en cours au début de l'intervalle, puis somme cumulée par période (fenêtre ordonnée par période :
+    # toutes les lignes d'une même période portent le total à la fin de celle-ci)
+    wip = transitions.filter(created_time__lt=as_datetime(start)).aggregate(wip=Sum(WIP_DELTA))['wip'] or 0
+    wip_by_period = {
+        as_date(period_value): wip + cumulated
+        for period_value, cumulated in in_range.annotate(period=trunc)
+        .annotate(cumulated=Window(Sum(WIP_DELTA), order_by=F('period').asc()))
+        .values_list('period', 'cumulated').distinct()
+    }
+
+    report = {}
+    for current in period_starts(period, start, end - timedelta(days=1)):
+        wip = wip_by_period.get(current, wip)
+        report[current] = {
+            'throughput': throughput.get(current, 0),
+            'cycle_time_hours': percentiles(sorted(cycle_times.get(current, []), key=lambda row: row[0])),
+            'wip': wip,
+        }
+    return report
+
+
+def report_cache_key(project_id, period, start):
+    database = router.db_for_write(IssueStatusTransition)
+    return f'report:{database}:{project_id}:{period}:{start.isoformat()}'
+
+
+def report_version_key(project_id, database=None):
+    database = database or router.db_for_write(IssueStatusTransition)
+    return f'report-version:{database}:{project_id}'
+
+
+def report_version(project_id):
+    """
+    Version des périodes en cache d'un projet (argument `version` du cache de Django).
+    """
+    key = report_version_key(project_id)
+    version = shared_cache.get(key)
+    if version is None:
+        # Jamais réutilisée : si la clé est évincée, les périodes mises en cache auparavant ne sont plus lues
+        shared_cache.add(key, time_ns(), None)
+        version = shared_cache.get(key)
+    return version
+
+
+def invalidate_reports(project_id, database=None):
+    """
+    Écarte les périodes en cache d'un projet : la suppression d'un problème efface son historique
+    (`on_delete=CASCADE`), y compris dans des périodes terminées.
+    """
+    shared_cache.set(report_version_key(project_id, database), time_ns(), None)
+
+
+def project_report(project_id, period, start, end):
+    """
+    Rapport d'un projet par période, des dates `start` à `end` incluses.
+
+    Les périodes terminées ne changent plus, sauf suppression d'un problème (voir `invalidate_reports`) :
+    elles sont mises en cache (`REPORT_CACHE_TIMEOUT`) et seules les périodes absentes du cache,
+    dont la période en cours, sont calculées.
+    """
+    starts = period_starts(period, start, end)
+    keys = {current: report_cache_key(project_id, period, current) for current in starts}
+    version = report_version(project_id)
+    cached = shared_cache.get_many(keys.values(), version=version)
+    report = {current: cached[keys[current]] for current in starts if keys[current] in cached}
+    missing = [current for current in starts if current not in report]
+    if missing:
+        computed = compute_report(project_id, period, missing[0], next_period(period, missing[-1]))
+        today = timezone.localdate()
+        shared_cache.set_many(
+            {keys[current]: computed[current] for current in missing if next_period(period, current) <= today},
+            settings.REPORT_CACHE_TIMEOUT,
+            version=version
+        )
+        report.update((current, computed[current]) for current in missing)
+    return [{'period': current.isoformat(), **report[current]} for current in starts]
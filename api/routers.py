@@ -0,0 +1,93 @@
+import contextvars
+import random
+
+from django.conf import settings
+
+
+# Shard du projet ciblé par la requête courante (voir ProjectShardMiddleware et api/sharding.py)
+_current_shard = contextvars.ContextVar('current_shard', default=None)
+
+# Modèles rattachés à un projet, hébergés sur le shard de celui-ci
+SHARDED_MODELS = {'project', 'contributor', 'issue', 'comment', 'issuestatustransition', 'notification'}
+
+# Lorsque ce drapeau est vrai, toutes les lectures sont faites sur la base principale.
+# Il est vrai par défaut (commandes, shell, workers) et n'est levé que par ReadYourWritesMiddleware,
+# pour les requêtes en lecture d'un client qui n'a pas écrit récemment.
+_use_primary = contextvars.ContextVar('use_primary', default=True)
+
+
+def use_primary(value=True):
+    """
+    Force (ou non) les lectures sur la base principale dans le contexte courant.
+
+    Retourne un jeton à passer à `reset_primary` pour restaurer l'état précédent.
+    """
+    return _use_primary.set(value)
+
+
+def reset_primary(token):
+    _use_primary.reset(token)
+
+
+def is_sharded(model):
+    return model._meta.app_label == 'api' and model._meta.model_name in SHARDED_MODELS
+
+
+class ProjectShardRouter:
+    """
+    Routeur envoyant les modèles rattachés à un projet sur le shard de ce projet.
+
+    Le shard est celui de l'objet manipulé s'il est connu, sinon celui du projet de la requête
+    courante. Les autres modèles (utilisateurs, annuaire) sont laissés au routeur suivant.
+    Sans shard configuré (`DATABASE_SHARDS`), ce routeur n'intervient pas.
+    """
+    def _db_for_model(self, model, **hints):
+        if not settings.DATABASE_SHARDS or not is_sharded(model):
+            return None
+        instance = hints.get('instance')
+        if instance is not None and is_sharded(type(instance)) and instance._state.db:
+            return instance._state.db
+        return _current_shard.get()
+
+    db_for_read = _db_for_model
+    db_for_write = _db_for_model
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not settings.DATABASE_SHARDS:
+            return None
+        if is_sharded(type(obj1)) and is_sharded(type(obj2)):
+            return obj1._state.db == obj2._state.db
+        # Les utilisateurs sont répliqués sur chaque shard
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class PrimaryReplicaRouter:
+    """
+    Routeur envoyant les écritures sur la base principale (`default`) et les lectures
+    sur l'un des réplicas listés dans `DATABASE_REPLICAS`.
+
+    Les lectures restent sur la base principale tant que le contexte l'exige (voir `use_primary`).
+    Les objets liés sont lus sur la même base que l'objet qui les référence.
+    """
+    def db_for_read(self, model, **hints):
+        if _use_primary.get() or not settings.DATABASE_REPLICAS:
+            return 'default'
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
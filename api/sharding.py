@@ -0,0 +1,250 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+
+from .models import (
+    Comment, Contributor, IdSequence, Issue, IssueStatusTransition, Project, ProjectShard, UserProject
+)
+from .routers import _current_shard
+
+
+class ProjectMoving(Exception):
+    """
+    Le projet est en cours de déplacement vers un autre shard : les écritures sont refusées.
+    """
+
+
+def shards_enabled():
+    return bool(settings.DATABASE_SHARDS)
+
+
+@contextmanager
+def activate_shard(database):
+    """
+    Dirige les modèles rattachés à un projet vers `database` le temps du bloc.
+    """
+    token = _current_shard.set(database)
+    try:
+        yield database
+    finally:
+        _current_shard.reset(token)
+
+
+def shard_for_project(project_id, for_write=False):
+    """
+    Retourne la base hébergeant un projet (la base principale s'il est absent de l'annuaire).
+
+    Lève `ProjectMoving` si une écriture est demandée pendant le déplacement du projet.
+    """
+    entry = ProjectShard.objects.using('default').filter(project_id=project_id).first()
+    if entry is None:
+        return 'default'
+    if entry.locked and for_write:
+        raise ProjectMoving()
+    return entry.database
+
+
+def choose_shard(project_id):
+    return settings.DATABASE_SHARDS[project_id % len(settings.DATABASE_SHARDS)]
+
+
+class IdAllocator:
+    """
+    Allocation d'identifiants globaux par blocs (hi/lo).
+
+    Chaque processus réserve `block_size` identifiants à la fois dans `IdSequence` (base principale),
+    ce qui garantit des identifiants uniques sur tous les shards sans écriture centrale à chaque insertion.
+    """
+    block_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocks = {}
+
+    def _reserve_block(self, model):
+        name = model._meta.label
+        with transaction.atomic(using='default'):
+            sequence = IdSequence.objects.using('default').select_for_update().filter(name=name).first()
+            if sequence is None:
+                # On démarre après les identifiants déjà utilisés sur la base principale
+                # (données d'avant le sharding)
+                current_max = model.objects.using('default').aggregate(value=Max('pk'))['value'] or 0
+                sequence = IdSequence.objects.using('default').create(name=name, next_value=current_max + 1)
+            start = sequence.next_value
+            sequence.next_value = start + self.block_size
+            sequence.save(using='default', update_fields=['next_value'])
+        return [start, start + self.block_size]
+
+    def reset(self):
+        """
+        Oublie les blocs réservés (ex: après l'annulation de la transaction qui les a réservés, dans les tests).
+        """
+        with self._lock:
+            self._blocks.clear()
+
+    def next_id(self, model):
+        with self._lock:
+            block = self._blocks.get(model)
+            if block is None or block[0] >= block[1]:
+                block = self._blocks[model] = self._reserve_block(model)
+            value = block[0]
+            block[0] += 1
+            return value
+
+
+allocator = IdAllocator()
+
+
+def assign_ids(objs):
+    """
+    Attribue un identifiant global aux objets qui n'en ont pas (ex: avant un `bulk_create`).
+    """
+    if not shards_enabled():
+        return objs
+    for obj in objs:
+        if obj.pk is None:
+            obj.pk = allocator.next_id(type(obj))
+    return objs
+
+
+def replicate_users(database, user_ids=None):
+    """
+    Copie sur un shard les utilisateurs de la base principale qui n'y sont pas encore.
+
+    Les contraintes de clés étrangères étant vérifiées par chaque base, les utilisateurs
+    référencés par un projet doivent exister sur son shard.
+    """
+    users = User.objects.using('default').all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    existing = set(
+        User.objects.using(database).filter(pk__in=[user.pk for user in users]).values_list('pk', flat=True)
+    )
+    missing = [user for user in users if user.pk not in existing]
+    User.objects.using(database).bulk_create(missing)
+    return len(missing)
+
+
+def projects_for_user(user, author_only=False):
+    """
+    Retourne les projets d'un utilisateur, en n'interrogeant que les shards qui en hébergent.
+    """
+    entries = UserProject.objects.using('default').filter(user=user)
+    if author_only:
+        entries = entries.filter(is_author=True)
+    by_database = {}
+    for project_id, database in entries.values_list('project_id', 'database'):
+        by_database.setdefault(database, []).append(project_id)
+
+    projects = []
+    for database, project_ids in by_database.items():
+        queryset = Project.objects.using(database).filter(pk__in=project_ids)
+        if author_only:
+            queryset = queryset.filter(author=user)
+        projects.extend(queryset)
+    return sorted(projects, key=lambda project: project.pk)
+
+
+def index_project_member(project, user_id, is_author=False):
+    UserProject.objects.using('default').update_or_create(
+        user_id=user_id,
+        project_id=project.pk,
+        defaults={'database': project._state.db, 'is_author': is_author}
+    )
+
+
+def index_project_members(project, user_ids):
+    """
+    Ajoute plusieurs contributeurs d'un projet à l'index en une seule requête (après un `bulk_create`).
+    """
+    UserProject.objects.using('default').bulk_create(
+        [UserProject(user_id=user_id, project_id=project.pk, database=project._state.db) for user_id in user_ids],
+        ignore_conflicts=True
+    )
+
+
+def unindex_project_members(project_id, user_ids, database):
+    """
+    Retire plusieurs contributeurs d'un projet de l'index en une seule requête.
+    """
+    UserProject.objects.using('default').filter(
+        project_id=project_id,
+        user_id__in=user_ids,
+        database=database,
+        is_author=False
+    ).delete()
+
+
+def unindex_project(project_id, database):
+    ProjectShard.objects.using('default').filter(project_id=project_id, database=database).delete()
+    UserProject.objects.using('default').filter(project_id=project_id, database=database).delete()
+
+
+def reindex_project(project, contributors):
+    UserProject.objects.using('default').filter(project_id=project.pk).delete()
+    entries = {project.author_id: UserProject(user_id=project.author_id, is_author=True)}
+    for contributor in contributors:
+        entries.setdefault(contributor.user_id, UserProject(user_id=contributor.user_id))
+    for entry in entries.values():
+        entry.project_id = project.pk
+        entry.database = project._state.db
+    UserProject.objects.using('default').bulk_create(entries.values())
+
+
+def move_project(project_id, target):
+    """
+    Déplace un projet, ses contributeurs, ses problèmes (avec leur historique) et leurs commentaires
+    vers le shard `target`.
+
+    Le projet est verrouillé en écriture pendant la copie. Les données sont copiées avec leurs
+    identifiants (globaux), l'annuaire et l'index utilisateur → projets sont mis à jour,
+    puis les données de la base source sont supprimées.
+    """
+    entry, _ = ProjectShard.objects.using('default').get_or_create(
+        project_id=project_id,
+        defaults={'database': 'default'}
+    )
+    source = entry.database
+    if source == target:
+        return source
+    ProjectShard.objects.using('default').filter(pk=project_id).update(locked=True)
+    try:
+        project = Project.objects.using(source).get(pk=project_id)
+        contributors = list(Contributor.objects.using(source).filter(project_id=project_id))
+        issues = list(Issue.objects.using(source).filter(project_id=project_id))
+        comments = list(Comment.objects.using(source).filter(issue__project_id=project_id))
+        transitions = list(IssueStatusTransition.objects.using(source).filter(project_id=project_id))
+        # L'historique n'est référencé par aucune table : il reçoit de nouveaux identifiants sur la cible
+        for transition in transitions:
+            transition.pk = None
+
+        user_ids = {project.author_id}
+        user_ids.update(contributor.user_id for contributor in contributors)
+        user_ids.update(issue.author_id for issue in issues)
+        user_ids.update(issue.assignee_id for issue in issues if issue.assignee_id)
+        user_ids.update(comment.author_id for comment in comments)
+        replicate_users(target, user_ids)
+
+        with transaction.atomic(using=target):
+            # Restes d'un déplacement interrompu
+            Project.objects.using(target).filter(pk=project_id).delete()
+            Project.objects.using(target).bulk_create([project])
+            Contributor.objects.using(target).bulk_create(contributors)
+            Issue.objects.using(target).bulk_create(issues)
+            Comment.objects.using(target).bulk_create(comments)
+            IssueStatusTransition.objects.using(target).bulk_create(transitions, batch_size=1000)
+
+        ProjectShard.objects.using('default').filter(pk=project_id).update(database=target)
+        project._state.db = target
+        reindex_project(project, contributors)
+        # L'annuaire pointant déjà vers la cible, la suppression sur la source ne le modifie pas ;
+        # elle ne modifie pas non plus les compteurs de la boîte de réception (les problèmes existent sur la cible)
+        with transaction.atomic(using=source):
+            Project.objects.using(source).filter(pk=project_id).delete()
+    finally:
+        ProjectShard.objects.using('default').filter(pk=project_id).update(locked=False)
+    return source
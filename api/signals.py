@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, reports, sharding
+from .models import Comment, Contributor, Issue, Project
+
+
+# Signaux du sharding : connectés par ApiConfig.ready() uniquement si des shards sont configurés,
+# afin que les suppressions en masse restent de simples DELETE sans shard.
+
+def assign_global_id(sender, instance, **kwargs):
+    # Identifiants uniques sur tous les shards
+    if instance.pk is None:
+        instance.pk = sharding.allocator.next_id(sender)
+
+
+def index_project(sender, instance, created, **kwargs):
+    if created:
+        sharding.index_project_member(instance, instance.author_id, is_author=True)
+
+
+def unindex_project(sender, instance, **kwargs):
+    sharding.unindex_project(instance.pk, instance._state.db)
+
+
+def index_contributor(sender, instance, created, **kwargs):
+    if created:
+        sharding.index_project_member(instance.project, instance.user_id)
+
+
+def replicate_user(sender, instance, using, raw=False, **kwargs):
+    # Les utilisateurs sont créés sur la base principale puis répliqués sur chaque shard
+    if using != 'default' or raw:
+        return
+    fields = {field.attname: getattr(instance, field.attname) for field in User._meta.concrete_fields}
+    fields.pop('id')
+    for database in settings.DATABASE_SHARDS:
+        User.objects.using(database).update_or_create(pk=instance.pk, defaults=fields)
+
+
+def delete_replicated_user(sender, instance, using, **kwargs):
+    if using != 'default':
+        return
+    for database in settings.DATABASE_SHARDS:
+        User.objects.using(database).filter(pk=instance.pk).delete()
+
+
+def connect_sharding_signals():
+    for model in (Project, Contributor, Issue, Comment):
+        pre_save.connect(assign_global_id, sender=model)
+    post_save.connect(index_project, sender=Project)
+    post_delete.connect(unindex_project, sender=Project)
+    post_save.connect(index_contributor, sender=Contributor)
+    post_save.connect(replicate_user, sender=User)
+    post_delete.connect(delete_replicated_user, sender=User)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Comment)
+def write_through_cache(sender, instance, using, **kwargs):
+    # Le cache n'est mis à jour qu'une fois la transaction validée
+    transaction.on_commit(lambda: cache.store(instance), using=using)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Comment)
+def invalidate_cache(sender, instance, using, **kwargs):
+    # Django remet `instance.pk` à None après la suppression : je garde l'identifiant pour le rappel
+    pk = instance.pk
+    cache.invalidate(sender, [pk], using)
+    transaction.on_commit(lambda: cache.invalidate(sender, [pk], using), using=using)
+
+
+@receiver(post_delete, sender=Issue)
+def invalidate_project_reports(sender, instance, using, **kwargs):
+    # L'historique du problème est supprimé avec lui : les périodes en cache du projet ne sont plus à jour
+    transaction.on_commit(lambda: reports.invalidate_reports(instance.project_id, using), using=using)
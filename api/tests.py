@@ -1,3 +1,1049 @@
-# from django.test import TestCase
+import gzip
+import io
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from smtplib import SMTPException
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core import mail, signing
+from django.core.cache import cache as shared_cache
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import DatabaseError, connection, router
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import cache, compression, hashing, inbox, notifications, profiling, reports, sharding
+from .compression import CompressionMiddleware
+from .middleware import AdminMiddlewareStack, ReadYourWritesMiddleware
+from .models import (
+    Comment, Contributor, IdSequence, InboxCounter, Issue, IssueStatusTransition, Notification, Project, ProjectShard
+)
+
+
+ISSUE_DATA = {'title': 'Issue', 'description': 'Description', 'priority': 'LOW', 'tag': 'BUG', 'status': 'TODO'}
+
+
+class ApiTestCase(TestCase):
+    """
+    Base des tests de l'API : un auteur de projet authentifié et des caches vides.
+
+    Toutes les bases sont utilisables, afin que les tests passent aussi avec le sharding
+    (`DRFPROJET10_DB_SHARDS=2 python manage.py test api`).
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.local_cache.clear()
+        shared_cache.clear()
+        sharding.allocator.reset()
+        self.author = User.objects.create(username='author', email='author@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.project = Project.objects.create(title='Project', description='Description', type='BACKEND',
+                                              author=self.author)
+
+    def create_issue(self, **fields):
+        return Issue.objects.create(**{**ISSUE_DATA, 'project': self.project, 'author': self.author, **fields})
+
+
+class ObjectCacheTests(ApiTestCase):
+    def test_put_does_not_recreate_issue_deleted_elsewhere(self):
+        issue = self.create_issue()
+        url = f'/projects/{self.project.id}/issues/{issue.id}/'
+        # Suppression par un autre processus : la copie du cache partagé reste en place
+        stale = cache.get_cached_object_or_404(Issue, issue.id)
+        Issue.objects.filter(pk=issue.id).delete()
+        cache.store(stale)
+
+        response = self.client.put(url, ISSUE_DATA, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Issue.objects.filter(pk=issue.id).exists())
+
+    def test_delete_invalidates_again_after_commit(self):
+        issue = self.create_issue()
+        stale = cache.get_cached_object_or_404(Issue, issue.id)
+        key = cache.cache_key(Issue, issue.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/projects/{self.project.id}/issues/{issue.id}/')
+            # Lecture concurrente avant la validation : l'ancienne version revient dans le cache partagé
+            shared_cache.set(key, stale)
+
+        self.assertIsNone(shared_cache.get(key))
+
+    def test_delete_uses_database_row(self):
+        issue = self.create_issue()
+        stale = cache.get_cached_object_or_404(Issue, issue.id)
+        Issue.objects.filter(pk=issue.id).delete()
+        cache.store(stale)
+
+        response = self.client.delete(f'/projects/{self.project.id}/issues/{issue.id}/')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchTests(ApiTestCase):
+    def batch(self, *requests):
+        response = self.client.post('/batch/', {'requests': list(requests)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [result['status'] for result in response.json()]
+
+    def test_non_api_views_are_rejected_per_request(self):
+        statuses = self.batch(
+            {'method': 'GET', 'path': '/admin/'},
+            {'method': 'GET', 'path': '/unknown/'},
+            {'method': 'POST', 'path': '/batch/', 'body': {'requests': [{'path': '/projects/'}]}},
+            {'method': 'GET', 'path': f'/projects/{self.project.id}/'},
+        )
+
+        self.assertEqual(statuses, [400, 404, 400, 200])
+
+    def test_unexpected_error_fails_only_its_request(self):
+        with mock.patch('api.views.ProjectDetail.get', side_effect=RuntimeError), self.assertLogs('api.batch'):
+            statuses = self.batch(
+                {'method': 'GET', 'path': f'/projects/{self.project.id}/'},
+                {'method': 'GET', 'path': '/projects/'},
+            )
+
+        self.assertEqual(statuses, [500, 200])
+
+    def test_streaming_response_is_rejected_and_closed(self):
+        stream = io.BytesIO(b'{"id": 1}')
+        with mock.patch('api.views.ProjectDetail.get', return_value=FileResponse(stream)):
+            response = self.client.post('/batch/', {'requests': [
+                {'method': 'GET', 'path': f'/projects/{self.project.id}/'},
+                {'method': 'GET', 'path': '/projects/'},
+            ]}, format='json')
+
+        results = response.json()
+        self.assertEqual([result['status'] for result in results], [400, 200])
+        self.assertEqual(results[0]['body'], {'detail': 'Streaming responses cannot be batched.'})
+        self.assertTrue(stream.closed)
+
+
+class ContributorsTests(ApiTestCase):
+    def test_users_must_be_ids_or_usernames(self):
+        url = f'/projects/{self.project.id}/users/'
+        for users in ([{'id': 2}], [[2]], [True], [1.5]):
+            with self.subTest(users=users):
+                response = self.client.put(url, {'users': users}, format='json')
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'users': ['Users must be ids or usernames.']})
+
+    def test_put_replaces_contributors(self):
+        bob = User.objects.create(username='bob')
+        alice = User.objects.create(username='alice')
+        url = f'/projects/{self.project.id}/users/'
+        self.client.put(url, {'users': [bob.id]}, format='json')
+
+        response = self.client.put(url, {'users': ['alice']}, format='json')
+
+        self.assertEqual(response.json(), [alice.id])
+
+
+class InboxCounterTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bob = User.objects.create(username='bob')
+        Contributor.objects.create(project=self.project, user=self.bob)
+        self.bob_client = APIClient()
+        self.bob_client.force_authenticate(self.bob)
+
+    def inbox(self):
+        response = self.bob_client.get('/inbox/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_assignment_before_first_visit_is_unread(self):
+        self.assertFalse(InboxCounter.objects.filter(user=self.bob).exists())
+        self.create_issue(title='Old', assignee=self.bob, author=self.bob)
+        self.create_issue(title='New', assignee=self.bob)
+
+        self.assertEqual(self.inbox()['counts'], {'open': 2, 'unread': 1})
+
+    def test_counts_follow_contributor_removal(self):
+        self.create_issue(assignee=self.bob)
+        self.assertEqual(self.inbox()['counts'], {'open': 1, 'unread': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/projects/{self.project.id}/users/{self.bob.id}/')
+        self.assertEqual(response.status_code, 204)
+
+        inbox = self.inbox()
+        self.assertEqual(inbox['results'], [])
+        self.assertEqual(inbox['counts'], {'open': 0, 'unread': 0})
+
+    def test_bulk_contributor_changes_recount_in_constant_queries(self):
+        users = User.objects.bulk_create([User(username=f'user{index}') for index in range(200)])
+        for user in users[:20]:
+            self.create_issue(assignee=user)
+        url = f'/projects/{self.project.id}/users/'
+
+        with CaptureQueriesContext(connection) as added:
+            response = self.client.put(url, {'users': [user.id for user in users]}, format='json')
+        self.assertEqual(len(response.json()), 200)
+        with CaptureQueriesContext(connection) as removed:
+            self.client.put(url, {'users': []}, format='json')
+
+        self.assertLess(len(added), 40)
+        self.assertLess(len(removed), 40)
+        self.assertEqual(
+            set(InboxCounter.objects.filter(user__in=users[:20]).values_list('open_count', flat=True)), {0}
+        )
+
+    def test_non_member_assignee_is_rejected_and_not_counted(self):
+        carol = User.objects.create(username='carol')
+        issue = self.create_issue()
+
+        response = self.client.put(f'/projects/{self.project.id}/issues/{issue.id}/',
+                                   {**ISSUE_DATA, 'assignee': carol.id}, format='json')
+        self.assertEqual(response.status_code, 403)
+        # Assignation hors API (ex: admin) : le problème n'est ni listé ni compté
+        self.create_issue(assignee=carol)
+
+        self.assertEqual(inbox.inbox_page(carol.id, 10)[0], [])
+        self.assertEqual(inbox.get_counts(carol.id), {'open': 0, 'unread': 0})
+
+    def test_deleting_issues_recounts_their_assignees(self):
+        issue = self.create_issue(assignee=self.bob)
+        for _ in range(50):
+            self.create_issue(assignee=self.bob)
+        self.assertEqual(self.inbox()['counts']['open'], 51)
+
+        self.client.delete(f'/projects/{self.project.id}/issues/{issue.id}/')
+        self.assertEqual(self.inbox()['counts']['open'], 50)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f'/projects/{self.project.id}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertLess(len(queries), 40)
+        self.assertEqual(self.inbox()['counts'], {'open': 0, 'unread': 0})
+
+    def test_counts_follow_contributor_replacement(self):
+        self.create_issue(assignee=self.bob)
+        url = f'/projects/{self.project.id}/users/'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(url, {'users': []}, format='json')
+        self.assertEqual(self.inbox()['counts']['open'], 0)
+
+        self.client.put(url, {'users': ['bob']}, format='json')
+
+        self.assertEqual(len(self.inbox()['results']), 1)
+        self.assertEqual(self.inbox()['counts']['open'], 1)
+
+
+class InlineExecutor:
+    """
+    Exécuteur minimal qui calcule immédiatement dans le thread appelant.
+    """
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class HashingPoolTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        # Calcul dans le thread de la requête : pas de processus dans les tests
+        self.pool = hashing.HashingPool(workers=0, queue_size=0, timeout=1)
+        patcher = mock.patch.object(hashing, '_pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.anonymous = APIClient()
+
+    def test_saturated_pool_returns_503(self):
+        self.author.password = make_password('Passw0rd!')
+        self.author.save(update_fields=['password'])
+        self.pool._slots.acquire()
+        self.addCleanup(self.pool._slots.release)
+        response = self.anonymous.post('/signup/', {
+            'username': 'newuser', 'password': 'Passw0rd!', 'first_name': 'New', 'last_name': 'User',
+            'email': 'newuser@example.com'
+        })
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(User.objects.filter(username='newuser').exists())
+        response = self.anonymous.post('/login/', {'username': 'author', 'password': 'Passw0rd!'})
+        self.assertEqual(response.status_code, 503)
+
+    def test_broken_pool_on_submit_is_reset(self):
+        pool = hashing.HashingPool(workers=1, queue_size=0, timeout=1)
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool()
+        pool._executor = broken
+        with self.assertRaises(hashing.HashingPoolSaturated):
+            pool.run(abs, -1)
+        broken.shutdown.assert_called_once()
+        self.assertIsNone(pool._executor)
+        # La place est libérée et un nouveau pool est créé à la demande suivante
+        with mock.patch.object(hashing, 'ProcessPoolExecutor', return_value=InlineExecutor()):
+            self.assertEqual(pool.run(abs, -1), 1)
+
+    def test_login_rehashes_password_when_cost_changes(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=500):
+            self.author.password = make_password('Passw0rd!')
+        self.author.save(update_fields=['password'])
+        response = self.anonymous.post('/login/', {'username': 'author', 'password': 'Passw0rd!'})
+        self.assertEqual(response.status_code, 200)
+        self.author.refresh_from_db()
+        self.assertEqual(identify_hasher(self.author.password).decode(self.author.password)['iterations'], 1000)
+        self.assertTrue(self.author.check_password('Passw0rd!'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], READ_YOUR_WRITES_SECONDS=5)
+class ReadYourWritesTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def call(self, request, status=200, batch_wrote=None):
+        # La vue note la base de lecture choisie pendant la requête
+        def view(request):
+            if batch_wrote is not None:
+                request.batch_wrote = batch_wrote
+            response = HttpResponse(status=status)
+            response.read_database = router.db_for_read(User)
+            return response
+        return ReadYourWritesMiddleware(view)(request)
+
+    def test_reads_go_to_replicas_until_the_client_writes(self):
+        response = self.call(self.factory.get('/projects/'))
+        self.assertEqual(response.read_database, 'replica_1')
+        self.assertNotIn(ReadYourWritesMiddleware.cookie_name, response.cookies)
+
+        response = self.call(self.factory.post('/projects/'))
+        self.assertEqual(response.read_database, 'default')
+        pin = response[ReadYourWritesMiddleware.header_name]
+        self.assertEqual(response.cookies[ReadYourWritesMiddleware.cookie_name].value, pin)
+
+        self.factory.cookies[ReadYourWritesMiddleware.cookie_name] = pin
+        self.assertEqual(self.call(self.factory.get('/projects/')).read_database, 'default')
+
+    def test_pin_header_is_accepted_without_cookies(self):
+        pin = self.call(self.factory.post('/projects/'))[ReadYourWritesMiddleware.header_name]
+
+        response = self.call(self.factory.get('/projects/', HTTP_X_PRIMARY_PIN=pin))
+
+        self.assertEqual(response.read_database, 'default')
+
+    def test_invalid_or_expired_pin_is_ignored(self):
+        pin = self.call(self.factory.post('/projects/'))[ReadYourWritesMiddleware.header_name]
+        tampered = self.call(self.factory.get('/projects/', HTTP_X_PRIMARY_PIN=pin + 'x'))
+        with mock.patch('django.core.signing.time.time', return_value=timezone.now().timestamp() + 10):
+            expired = self.call(self.factory.get('/projects/', HTTP_X_PRIMARY_PIN=pin))
+
+        self.assertEqual(tampered.read_database, 'replica_1')
+        self.assertEqual(expired.read_database, 'replica_1')
+
+    def test_failed_writes_and_read_only_batches_do_not_pin(self):
+        self.assertNotIn(ReadYourWritesMiddleware.header_name, self.call(self.factory.post('/projects/'), status=400))
+        response = self.call(self.factory.post('/batch/'), batch_wrote=False)
+        self.assertEqual(response.read_database, 'default')
+        self.assertNotIn(ReadYourWritesMiddleware.header_name, response)
+        self.assertIn(ReadYourWritesMiddleware.header_name, self.call(self.factory.post('/batch/'), batch_wrote=True))
+
+    def test_primary_is_restored_after_the_request(self):
+        self.call(self.factory.get('/projects/'))
+
+        self.assertEqual(router.db_for_read(User), 'default')
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.content = json.dumps([{'id': index, 'title': 'Issue'} for index in range(100)]).encode()
+
+    def call(self, response, accept_encoding='gzip'):
+        request = self.factory.get('/projects/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_encoding_is_negotiated_from_accept_encoding(self):
+        with mock.patch.dict(compression.ENCODERS, {'zstd': None, 'br': None, 'gzip': None}, clear=True):
+            self.assertEqual(compression.negotiate('gzip, br'), 'br')
+            self.assertEqual(compression.negotiate('gzip;q=1.0, br;q=0.5, zstd;q=0'), 'gzip')
+            self.assertEqual(compression.negotiate('*;q=0.5, zstd;q=0'), 'br')
+            self.assertEqual(compression.negotiate('GZIP ; q=0.8'), 'gzip')
+            self.assertIsNone(compression.negotiate('identity, deflate'))
+            self.assertIsNone(compression.negotiate('gzip;q=0'))
+            self.assertIsNone(compression.negotiate(''))
+
+    def test_large_json_response_is_compressed(self):
+        response = self.call(HttpResponse(self.content, content_type='application/json', headers={'ETag': '"v1"'}))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+    def test_response_is_not_compressed_without_accepted_encoding(self):
+        response = self.call(HttpResponse(self.content, content_type='application/json'), accept_encoding='')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.content)
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_small_response_is_not_compressed(self):
+        response = self.call(HttpResponse(b'{"id": 1}', content_type='application/json'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, b'{"id": 1}')
+
+    def test_already_encoded_or_binary_response_is_left_untouched(self):
+        encoded = HttpResponse(b'compressed', content_type='application/json', headers={'Content-Encoding': 'br'})
+        binary = HttpResponse(self.content, content_type='image/png')
+
+        for response in (encoded, binary):
+            response = self.call(response)
+            self.assertFalse(response.has_header('Vary'))
+        self.assertEqual(encoded['Content-Encoding'], 'br')
+        self.assertEqual(encoded.content, b'compressed')
+        self.assertFalse(binary.has_header('Content-Encoding'))
+
+    def test_streaming_response_is_compressed_on_the_fly(self):
+        chunks = [self.content[index:index + 500] for index in range(0, len(self.content), 500)]
+        response = StreamingHttpResponse(iter(chunks), content_type='application/json')
+        response['Content-Length'] = str(len(self.content))
+
+        response = self.call(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.content)
+
+
+class NotificationTestCase(ApiTestCase):
+    """
+    Base des tests des notifications : deux contributeurs destinataires.
+    """
+    def setUp(self):
+        super().setUp()
+        self.bob = User.objects.create(username='bob', email='bob@example.com')
+        self.alice = User.objects.create(username='alice', email='alice@example.com')
+        for user in (self.bob, self.alice):
+            Contributor.objects.create(project=self.project, user=user)
+
+    def notify(self, recipient, title='Issue'):
+        return notifications.notify_assignment(self.create_issue(title=title, assignee=recipient), self.author)
+
+
+class NotificationTests(NotificationTestCase):
+    def test_outbox_row_is_written_with_the_issue(self):
+        response = self.client.post(f'/projects/{self.project.id}/issues/', {**ISSUE_DATA, 'assignee': self.bob.id},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 201)
+        notification = Notification.objects.get()
+        self.assertEqual((notification.recipient, notification.kind, notification.status),
+                         (self.bob, 'ASSIGNMENT', 'PENDING'))
+        self.assertEqual(notification.payload['issue'], response.json()['id'])
+
+    def test_outbox_row_is_rolled_back_with_the_issue(self):
+        def notify_then_fail(issue, actor):
+            notifications.notify_assignment(issue, actor)
+            raise DatabaseError
+
+        with mock.patch('api.views.notify_assignment', side_effect=notify_then_fail):
+            with self.assertRaises(DatabaseError):
+                self.client.post(f'/projects/{self.project.id}/issues/', {**ISSUE_DATA, 'assignee': self.bob.id},
+                                 format='json')
+
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_self_assignment_is_not_notified(self):
+        self.assertIsNone(self.notify(self.author))
+
+    def test_events_are_coalesced_per_recipient(self):
+        self.notify(self.bob, 'First')
+        self.notify(self.bob, 'Second')
+        self.notify(self.alice, 'Third')
+
+        self.assertEqual(notifications.deliver_pending(), (3, 0))
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['alice@example.com', 'bob@example.com'])
+        digest = next(message for message in mail.outbox if message.to == ['bob@example.com'])
+        self.assertIn('2 nouvelle(s)', digest.subject)
+        self.assertIn('"First"', digest.body)
+        self.assertIn('"Second"', digest.body)
+        self.assertEqual(set(Notification.objects.values_list('status', flat=True)), {'SENT'})
+        self.assertEqual(notifications.deliver_pending(), (0, 0))
+
+    @override_settings(NOTIFICATIONS_MAX_ATTEMPTS=3, NOTIFICATIONS_RETRY_BASE_SECONDS=30)
+    def test_failed_delivery_is_retried_with_backoff_then_failed(self):
+        notification = self.notify(self.bob)
+        transport = mock.MagicMock()
+        transport.__enter__.return_value = transport
+        transport.send.side_effect = ConnectionError('Unreachable')
+
+        for attempt, delay in ((1, 30), (2, 60)):
+            before = timezone.now()
+            self.assertEqual(notifications.deliver_pending(transport=transport), (0, 1))
+            notification.refresh_from_db()
+            self.assertEqual((notification.status, notification.attempts), ('PENDING', attempt))
+            self.assertEqual(notification.last_error, 'Unreachable')
+            self.assertGreaterEqual(notification.next_attempt_time, before + timedelta(seconds=delay))
+            self.assertLessEqual(notification.next_attempt_time, timezone.now() + timedelta(seconds=delay))
+            # Pas de nouvelle tentative avant l'échéance
+            self.assertEqual(notifications.deliver_pending(transport=transport), (0, 0))
+            Notification.objects.filter(pk=notification.pk).update(next_attempt_time=timezone.now())
+
+        self.assertEqual(notifications.deliver_pending(transport=transport), (0, 1))
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('FAILED', 3))
+
+    def test_recipient_without_email_fails_permanently(self):
+        self.bob.email = ''
+        self.bob.save()
+        notification = self.notify(self.bob)
+
+        self.assertEqual(notifications.deliver_pending(), (0, 1))
+
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('FAILED', 1))
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(NOTIFICATIONS_RETRY_BASE_SECONDS=30)
+    def test_connection_error_is_retried_with_backoff(self):
+        first = self.notify(self.bob)
+        second = self.notify(self.alice)
+        before = timezone.now()
+
+        with mock.patch.object(locmem.EmailBackend, 'open', side_effect=SMTPException('Connection refused')):
+            self.assertEqual(notifications.deliver_pending(), (0, 2))
+
+        for notification in (first, second):
+            notification.refresh_from_db()
+            self.assertEqual((notification.status, notification.attempts), ('PENDING', 1))
+            self.assertEqual(notification.last_error, 'Connection refused')
+            self.assertGreaterEqual(notification.next_attempt_time, before + timedelta(seconds=30))
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_keeps_running_after_an_error(self):
+        class Stop(Exception):
+            pass
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        command = 'api.management.commands.send_notifications'
+        with mock.patch(f'{command}.notification_databases', return_value=['default']), \
+                mock.patch(f'{command}.deliver_pending', side_effect=[DatabaseError('down'), (1, 0), (0, 0)]), \
+                mock.patch(f'{command}.time.sleep', side_effect=[None, Stop]):
+            with self.assertRaises(Stop):
+                call_command('send_notifications', '--loop', stdout=stdout, stderr=stderr)
+
+        self.assertIn("default: DatabaseError('down')", stderr.getvalue())
+        self.assertIn('default: 1 sent, 0 failed', stdout.getvalue())
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append((self.headers['Content-Type'], json.loads(body)))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class WebhookTransportTests(NotificationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), WebhookHandler)
+        self.server.received = []
+        self.server.status = 204
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        settings_override = override_settings(
+            NOTIFICATIONS_TRANSPORT='webhook',
+            NOTIFICATIONS_WEBHOOK_URL=f'http://127.0.0.1:{self.server.server_port}/hook',
+            NOTIFICATIONS_WEBHOOK_TIMEOUT=5
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_digest_is_posted_as_json(self):
+        first = self.notify(self.bob, 'First')
+        second = self.notify(self.bob, 'Second')
+
+        self.assertEqual(notifications.deliver_pending(), (2, 0))
+
+        content_type, payload = self.server.received[0]
+        self.assertEqual(content_type, 'application/json')
+        self.assertEqual((payload['recipient'], payload['username']), (self.bob.id, 'bob'))
+        self.assertEqual([(event['id'], event['kind'], event['title']) for event in payload['events']],
+                         [(first.id, 'ASSIGNMENT', 'First'), (second.id, 'ASSIGNMENT', 'Second')])
+
+    def test_error_response_is_retried(self):
+        self.server.status = 500
+        notification = self.notify(self.bob)
+
+        self.assertEqual(notifications.deliver_pending(), (0, 1))
+
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('PENDING', 1))
+        self.assertIn('500', notification.last_error)
+
+
+class IssueHistoryTests(ApiTestCase):
+    def transitions(self, issue):
+        return list(IssueStatusTransition.objects.filter(issue=issue).order_by('id').values_list(
+            'from_status', 'to_status'
+        ))
+
+    def test_status_changes_are_recorded(self):
+        issue = self.create_issue()
+        issue.status = 'ONGOING'
+        issue.save()
+        issue.title = 'Renamed'
+        issue.save()
+
+        self.assertEqual(self.transitions(issue), [(None, 'TODO'), ('TODO', 'ONGOING')])
+
+    def test_deferred_status_is_not_a_change(self):
+        issue = self.create_issue()
+
+        partial = Issue.objects.only('id', 'title', 'author', 'project').get(pk=issue.pk)
+        partial.title = 'Renamed'
+        partial.save()
+        deferred = Issue.objects.defer('status').get(pk=issue.pk)
+        deferred.status = 'DONE'
+        deferred.save()
+
+        self.assertEqual(self.transitions(issue), [(None, 'TODO'), ('TODO', 'DONE')])
+
+    def test_refresh_from_db_updates_the_loaded_status(self):
+        issue = Issue.objects.get(pk=self.create_issue().pk)
+        Issue.objects.filter(pk=issue.pk).update(status='ONGOING')
+
+        issue.refresh_from_db()
+        issue.save()
+        issue.refresh_from_db(fields=['status'])
+        issue.save()
+
+        self.assertEqual(self.transitions(issue), [(None, 'TODO')])
+
+
+class ProjectReportTests(ApiTestCase):
+    def history(self, *changes):
+        """
+        Crée un problème et son historique : suite de (statut, date et heure).
+        """
+        issue = self.create_issue()
+        IssueStatusTransition.objects.filter(issue=issue).delete()
+        previous = None
+        for to_status, moment in changes:
+            IssueStatusTransition.objects.create(issue=issue, project=self.project, from_status=previous,
+                                                 to_status=to_status, created_time=timezone.make_aware(moment))
+            previous = to_status
+        return issue
+
+    def setUp(self):
+        super().setUp()
+        # Semaine du 5 janvier : deux problèmes terminés en 2 h et 24 h
+        self.history(('ONGOING', datetime(2026, 1, 5, 10)), ('DONE', datetime(2026, 1, 5, 12)))
+        self.history(('ONGOING', datetime(2026, 1, 6, 10)), ('DONE', datetime(2026, 1, 7, 10)))
+        # Semaine du 12 janvier : un problème commencé la semaine précédente, terminé en 168 h
+        self.history(('ONGOING', datetime(2026, 1, 6, 12)), ('DONE', datetime(2026, 1, 13, 12)))
+        self.history(('TODO', datetime(2026, 1, 12, 9)), ('ONGOING', datetime(2026, 1, 14, 9)))
+        # En cours depuis avant le rapport
+        self.history(('ONGOING', datetime(2025, 12, 30, 9)))
+
+    def test_weekly_throughput_cycle_time_and_wip(self):
+        report = reports.compute_report(self.project.id, 'week', date(2026, 1, 5), date(2026, 1, 26))
+
+        self.assertEqual(report, {
+            date(2026, 1, 5): {'throughput': 2, 'cycle_time_hours': {'p50': 2.0, 'p85': 24.0, 'p95': 24.0}, 'wip': 2},
+            date(2026, 1, 12): {
+                'throughput': 1, 'cycle_time_hours': {'p50': 168.0, 'p85': 168.0, 'p95': 168.0}, 'wip': 2
+            },
+            date(2026, 1, 19): {
+                'throughput': 0, 'cycle_time_hours': {'p50': None, 'p85': None, 'p95': None}, 'wip': 2
+            },
+        })
+
+    def test_monthly_report(self):
+        report = reports.compute_report(self.project.id, 'month', date(2026, 1, 1), date(2026, 2, 1))
+
+        self.assertEqual(report[date(2026, 1, 1)]['throughput'], 3)
+        self.assertEqual(report[date(2026, 1, 1)]['cycle_time_hours']['p50'], 24.0)
+        self.assertEqual(report[date(2026, 1, 1)]['wip'], 2)
+
+    def test_period_count_matches_period_starts(self):
+        for period in reports.PERIODS:
+            for start, end in ((date(2026, 1, 5), date(2026, 1, 5)), (date(2025, 12, 31), date(2026, 3, 2)),
+                               (date(2024, 2, 29), date(2026, 1, 1))):
+                with self.subTest(period=period, start=start, end=end):
+                    self.assertEqual(reports.period_count(period, start, end),
+                                     len(reports.period_starts(period, start, end)))
+
+    def test_invalid_ranges_are_rejected(self):
+        url = f'/projects/{self.project.id}/report/'
+        for query in ('period=week&end=9999-12-31&start=9999-12-01', 'period=month&end=9999-12-31&start=9999-01-01',
+                      'end=0001-01-05', 'start=0001-01-01&end=9999-12-31', 'start=2026-02-01&end=2026-01-01',
+                      'end=2026-13-01', 'period=day'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'{url}?{query}').status_code, 400)
+
+    def test_deleting_an_issue_invalidates_finished_periods(self):
+        url = f'/projects/{self.project.id}/report/?period=week&start=2026-01-05&end=2026-01-11'
+        self.assertEqual(self.client.get(url).json()[0]['throughput'], 2)
+        issue = IssueStatusTransition.objects.filter(to_status='DONE').order_by('created_time').first().issue
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/projects/{self.project.id}/issues/{issue.id}/')
+        self.assertEqual(response.status_code, 204)
+
+        report = self.client.get(url).json()[0]
+        self.assertEqual(report['throughput'], 1)
+        self.assertEqual(report['cycle_time_hours']['p50'], 24.0)
+
+
+class IssueAdminTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.admin_client = APIClient()
+        self.admin_client.force_login(self.admin)
+        self.bob = User.objects.create(username='bob')
+        Contributor.objects.create(project=self.project, user=self.bob)
+        self.other_project = Project.objects.create(title='Other', description='Description', type='BACKEND',
+                                                    author=self.author)
+
+    def reassign(self, issues, assignee):
+        response = self.admin_client.post('/admin/api/issue/', {
+            'action': 'reassign_issues',
+            '_selected_action': [issue.id for issue in issues],
+            'assignee': assignee.id,
+        })
+        self.assertEqual(response.status_code, 302)
+        return [str(message) for message in get_messages(response.wsgi_request)]
+
+    def test_reassign_only_to_project_members(self):
+        issue = self.create_issue()
+        already_assigned = self.create_issue(assignee=self.bob)
+        elsewhere = self.create_issue(project=self.other_project)
+
+        messages = self.reassign([issue, already_assigned, elsewhere], self.bob)
+
+        self.assertEqual(messages[0], '1 issue(s) reassigned.')
+        self.assertIn('1 issue(s) skipped', messages[1])
+        self.assertEqual(
+            dict(Issue.objects.values_list('id', 'assignee_id')),
+            {issue.id: self.bob.id, already_assigned.id: self.bob.id, elsewhere.id: self.author.id}
+        )
+        notification = Notification.objects.get()
+        self.assertEqual((notification.recipient, notification.payload['issue']), (self.bob, issue.id))
+        self.assertEqual(inbox.get_counts(self.bob.id), {'open': 2, 'unread': 2})
+
+    def test_reassign_to_oneself_is_not_notified(self):
+        Contributor.objects.create(project=self.project, user=self.admin)
+        issue = self.create_issue()
+
+        self.assertEqual(self.reassign([issue], self.admin), ['1 issue(s) reassigned.'])
+
+        self.assertEqual(Issue.objects.get().assignee, self.admin)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(inbox.get_counts(self.admin.id), {'open': 1, 'unread': 0})
+
+
+class ProfilingTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin = User.objects.create(username='admin', is_staff=True)
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin)
+
+    def files(self):
+        return sorted(path.suffix for path in self.directory.iterdir())
+
+    def test_request_with_a_valid_token_is_profiled(self):
+        response = self.client.get('/projects/', HTTP_X_PROFILE=profiling.make_token())
+
+        self.assertEqual(response.status_code, 200)
+        name = response['X-Profile-Id']
+        self.assertEqual(self.files(), ['.json', '.prof'])
+        report = json.loads((self.directory / f'{name}.json').read_text())
+        self.assertEqual((report['mode'], report['method'], report['path'], report['status']),
+                         ('cprofile', 'GET', '/projects/', 200))
+        self.assertGreater(report['sql_count'], 0)
+        self.assertTrue(all(query['origin'] for query in report['sql']))
+
+    def test_sampling_token_writes_collapsed_stacks(self):
+        response = self.client.get('/projects/', HTTP_X_PROFILE=profiling.make_token('sampling'))
+
+        self.assertIn('X-Profile-Id', response)
+        self.assertEqual(self.files(), ['.folded', '.json'])
+
+    def test_request_without_a_valid_token_is_not_profiled(self):
+        token = profiling.make_token()
+        other_salt = signing.TimestampSigner(salt='other').sign('cprofile')
+
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            for value in ('cprofile', token + 'x', other_salt, profiling.make_token('unknown')):
+                response = self.client.get('/projects/', HTTP_X_PROFILE=value)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('X-Profile-Id', response)
+        with override_settings(PROFILING_TOKEN_MAX_AGE=60), \
+                mock.patch('time.time', return_value=time.time() + 120):
+            self.assertNotIn('X-Profile-Id', self.client.get('/projects/', HTTP_X_PROFILE=token))
+        self.assertEqual(self.files(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.25, PROFILING_SAMPLE_MODE='sampling')
+    def test_requests_are_sampled_at_the_configured_rate(self):
+        with mock.patch('api.profiling.random.random', side_effect=[0.2, 0.3]):
+            sampled = self.client.get('/projects/')
+            skipped = self.client.get('/projects/')
+
+        self.assertIn('X-Profile-Id', sampled)
+        self.assertNotIn('X-Profile-Id', skipped)
+        self.assertEqual(self.files(), ['.folded', '.json'])
+
+    def test_reports_are_listed_for_admins_only(self):
+        first = self.client.get('/projects/', HTTP_X_PROFILE=profiling.make_token())['X-Profile-Id']
+        second = self.client.get('/inbox/', HTTP_X_PROFILE=profiling.make_token('sampling'))['X-Profile-Id']
+
+        self.assertEqual(self.client.get('/profiles/').status_code, 403)
+        response = self.admin_client.get('/profiles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({report['name']: report['mode'] for report in response.json()},
+                         {first: 'cprofile', second: 'sampling'})
+        self.assertTrue(all('sql' not in report for report in response.json()))
+
+    def test_report_detail_and_download(self):
+        name = self.client.get('/projects/', HTTP_X_PROFILE=profiling.make_token())['X-Profile-Id']
+
+        self.assertEqual(self.client.get(f'/profiles/{name}/').status_code, 403)
+        report = self.admin_client.get(f'/profiles/{name}/').json()
+        self.assertEqual(report['name'], name)
+        self.assertIn('cumulative', report['summary'])
+        self.assertIn('sql', report)
+
+        response = self.admin_client.get(f'/profiles/{name}/', {'download': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{name}.prof"')
+        self.assertEqual(b''.join(response.streaming_content), (self.directory / f'{name}.prof').read_bytes())
+        response.close()
+        self.assertEqual(self.admin_client.get('/profiles/missing/').status_code, 404)
+        self.assertEqual(self.admin_client.get(f'/profiles/{name}.prof/').status_code, 404)
+
+
+PRODUCTION_MIDDLEWARE = [
+    middleware for middleware in settings.MIDDLEWARE if middleware not in settings.ADMIN_MIDDLEWARE
+] + ['api.middleware.AdminMiddlewareStack']
+
+
+class AdminMiddlewareStackTests(ApiTestCase):
+    """
+    Pile de middlewares de production : sessions, CSRF et messages ne s'appliquent que sous /admin/.
+    """
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(MIDDLEWARE=PRODUCTION_MIDDLEWARE)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.factory = RequestFactory()
+
+    def call(self, path):
+        # La vue note les attributs posés sur la requête par les middlewares de l'admin
+        def view(request):
+            response = HttpResponse()
+            response.request_attributes = {
+                name for name in ('session', 'user', '_messages', 'csrf_processing_done') if hasattr(request, name)
+            }
+            return response
+
+        # Comme le handler de Django : process_view est appelé juste avant la vue
+        def handler(request):
+            return stack.process_view(request, view, (), {}) or view(request)
+        stack = AdminMiddlewareStack(handler)
+        return stack(self.factory.get(path))
+
+    def test_admin_middleware_only_applies_under_the_admin_prefix(self):
+        admin = self.call('/admin/api/project/')
+        api = self.call('/projects/')
+
+        self.assertEqual(admin.request_attributes, {'session', 'user', '_messages', 'csrf_processing_done'})
+        self.assertEqual(admin['X-Frame-Options'], 'DENY')
+        self.assertEqual(api.request_attributes, set())
+        self.assertFalse(api.has_header('X-Frame-Options'))
+
+    def test_admin_requires_a_session_and_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        self.assertEqual(client.get('/admin/').status_code, 302)
+        client.force_login(self.admin)
+
+        response = client.get('/admin/api/project/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.session['_auth_user_id'], str(self.admin.pk))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertEqual(client.post('/admin/api/project/add/', {'title': 'Admin'}).status_code, 403)
+
+    def test_api_routes_stay_stateless(self):
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(self.admin)
+        # Le cookie de session de l'admin n'authentifie pas l'API
+        self.assertEqual(client.get('/projects/').status_code, 401)
+
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.author)}')
+        response = client.get('/projects/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertNotIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        self.assertFalse(response.has_header('X-Frame-Options'))
+        # Pas de jeton CSRF à fournir pour une écriture authentifiée par JWT
+        response = client.post('/projects/', {'title': 'API', 'description': 'Description', 'type': 'BACKEND'},
+                               format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+
+@override_settings(DATABASE_SHARDS=['shard_1', 'shard_2'], DATABASE_REPLICAS=[])
+class ShardRouterTests(SimpleTestCase):
+    def test_project_models_follow_the_current_shard(self):
+        self.assertEqual(router.db_for_write(Issue), 'default')
+        with sharding.activate_shard('shard_2'):
+            for model in (Project, Contributor, Issue, Comment, IssueStatusTransition, Notification):
+                self.assertEqual(router.db_for_read(model), 'shard_2')
+                self.assertEqual(router.db_for_write(model), 'shard_2')
+            self.assertEqual(router.db_for_write(User), 'default')
+            self.assertEqual(router.db_for_write(ProjectShard), 'default')
+
+    def test_instance_database_wins_over_the_current_shard(self):
+        issue = Issue()
+        issue._state.db = 'shard_1'
+
+        with sharding.activate_shard('shard_2'):
+            self.assertEqual(router.db_for_write(Comment, instance=issue), 'shard_1')
+
+    def test_relations_stay_within_a_shard(self):
+        issue, other_issue, user = Issue(), Issue(), User()
+        issue._state.db, other_issue._state.db, user._state.db = 'shard_1', 'shard_2', 'default'
+
+        self.assertFalse(router.allow_relation(issue, other_issue))
+        self.assertTrue(router.allow_relation(issue, user))
+
+    def test_projects_are_spread_by_id(self):
+        self.assertEqual([sharding.choose_shard(project_id) for project_id in (1, 2, 3)],
+                         ['shard_2', 'shard_1', 'shard_2'])
+
+    @override_settings(DATABASE_SHARDS=[])
+    def test_router_is_inactive_without_shards(self):
+        with sharding.activate_shard('shard_2'):
+            self.assertEqual(router.db_for_write(Issue), 'default')
+
+
+class IdAllocatorTests(TestCase):
+    databases = '__all__'
+
+    def test_blocks_are_reserved_after_existing_ids(self):
+        existing = User.objects.create(username='existing')
+        first, second = sharding.IdAllocator(), sharding.IdAllocator()
+        first.block_size = second.block_size = 3
+
+        ids = [first.next_id(User) for _ in range(2)] + [second.next_id(User)] + [first.next_id(User)]
+
+        start = existing.pk + 1
+        self.assertEqual(ids, [start, start + 1, start + 3, start + 2])
+        self.assertEqual(IdSequence.objects.get(name='auth.User').next_value, start + 6)
+        # Bloc épuisé : un nouveau bloc est réservé après celui de l'autre processus
+        self.assertEqual(first.next_id(User), start + 6)
+
+
+@skipUnless(settings.DATABASE_SHARDS, 'DRFPROJET10_DB_SHARDS is not set')
+class ShardingTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bob = User.objects.create(username='bob')
+        sharding.replicate_users(settings.DATABASE_SHARDS[0])
+        sharding.replicate_users(settings.DATABASE_SHARDS[-1])
+
+    def create_project(self, title):
+        response = self.client.post('/projects/', {'title': title, 'description': 'Description', 'type': 'BACKEND'},
+                                    format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def shard_of(self, project_id):
+        return ProjectShard.objects.get(project_id=project_id).database
+
+    def test_projects_are_listed_across_shards(self):
+        project_ids = [self.create_project(f'Project {index}') for index in range(4)]
+
+        self.assertEqual({self.shard_of(project_id) for project_id in project_ids}, set(settings.DATABASE_SHARDS))
+        listed = [project['id'] for project in self.client.get('/projects/').json()]
+        self.assertEqual(sorted(listed), sorted([self.project.id, *project_ids]))
+        bob = APIClient()
+        bob.force_authenticate(self.bob)
+        self.assertEqual(bob.get('/projects/').json(), [])
+
+    def test_move_project_keeps_its_data_and_inbox_counts(self):
+        project_id = self.create_project('Moved')
+        self.client.put(f'/projects/{project_id}/users/', {'users': ['bob']}, format='json')
+        issue_id = self.client.post(f'/projects/{project_id}/issues/', {**ISSUE_DATA, 'assignee': self.bob.id},
+                                    format='json').json()['id']
+        self.client.post(f'/projects/{project_id}/issues/{issue_id}/comments/', {'description': 'Comment'},
+                         format='json')
+        bob = APIClient()
+        bob.force_authenticate(self.bob)
+        self.assertEqual(bob.get('/inbox/').json()['counts'], {'open': 1, 'unread': 1})
+        source = self.shard_of(project_id)
+        target = next(database for database in settings.DATABASE_SHARDS if database != source)
+
+        self.assertEqual(sharding.move_project(project_id, target), source)
+
+        self.assertEqual(self.shard_of(project_id), target)
+        self.assertFalse(Project.objects.using(source).filter(pk=project_id).exists())
+        self.assertFalse(Issue.objects.using(source).filter(pk=issue_id).exists())
+        self.assertTrue(Comment.objects.using(target).filter(issue_id=issue_id).exists())
+        self.assertEqual(IssueStatusTransition.objects.using(target).filter(issue_id=issue_id).count(), 1)
+        self.assertEqual(self.client.get(f'/projects/{project_id}/users/').json(), [self.bob.id])
+        self.assertEqual([issue['id'] for issue in self.client.get(f'/projects/{project_id}/issues/').json()],
+                         [issue_id])
+        inbox = bob.get('/inbox/').json()
+        self.assertEqual([issue['id'] for issue in inbox['results']], [issue_id])
+        self.assertEqual(inbox['counts'], {'open': 1, 'unread': 1})
+
+    def test_writes_are_refused_while_moving(self):
+        project_id = self.create_project('Locked')
+        ProjectShard.objects.filter(project_id=project_id).update(locked=True)
+
+        self.assertEqual(self.client.get(f'/projects/{project_id}/').status_code, 200)
+        response = self.client.put(f'/projects/{project_id}/', {'title': 'New', 'description': 'D', 'type': 'X'},
+                                   format='json')
+        self.assertEqual(response.status_code, 503)
@@ -2,11 +2,27 @@ from django.contrib.auth.models import User
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework import generics
-from .models import Project, Contributor, Issue, Comment
+from .models import Project, Contributor, Issue, Comment, ProjectShard
 from .serializers import ProjectSerializer, ContributorSerializer, IssueSerializer, CommentSerializer
+from .notifications import notify_assignment, notify_comment
+from .hashing import hash_password
+from .cache import get_cached_object_or_404, get_object_for_update_or_404
+from .profiling import list_reports, load_report
+from .batch import BatchError, parse_batch, run_batch
+from .reports import PERIODS, period_count, project_report
+from .inbox import decode_cursor, get_counts, inbox_page, mark_read, recount
+from .sharding import (
+    activate_shard, allocator, assign_ids, choose_shard, index_project_members, projects_for_user, shards_enabled,
+    unindex_project_members
+)
+from django.conf import settings
+from django.db import router, transaction
 from django.db.models import Q
+from django.http import FileResponse, Http404
+from django.utils import timezone
+from datetime import date, timedelta
 from django.shortcuts import get_object_or_404
 from rest_framework.exceptions import PermissionDenied
 import re
@@ -57,13 +73,15 @@ class SignupView(APIView):
             return Response({'error': 'Invalid email address'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Création de l'utilisateur
-        user = User.objects.create_user(
-            username=username,
-            password=password,
+        # (le mot de passe est haché dans le pool dédié, qui renvoie une 503 s'il est saturé)
+        user = User(
+            username=User.normalize_username(username),
             first_name=first_name,
             last_name=last_name,
-            email=email
+            email=User.objects.normalize_email(email)
         )
+        user.password = hash_password(password)
+        user.save()
 
         if user:
             return Response({'message': 'User created'}, status=status.HTTP_201_CREATED)
@@ -79,8 +97,8 @@ class ProjectList(generics.ListCreateAPIView):
     Elle est utilisée pour créer et récupérer les projets d'un utilisateur spécifique.
 
     Méthodes:
-    - `perform_create` : Ajoute l'auteur à un projet lors de sa création.
-    - `get_queryset` : Récupère les projets pour l'utilisateur connecté.
+    - `perform_create` : Ajoute l'auteur à un projet lors de sa création et choisit son shard.
+    - `get_queryset` : Récupère les projets pour l'utilisateur connecté (sur tous les shards qui en hébergent).
 
     Attributs:
     - `serializer_class` : Spécifie le sérialiseur à utiliser pour le traitement des données.
@@ -90,9 +108,19 @@ class ProjectList(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        if not settings.DATABASE_SHARDS:
+            serializer.save(author=self.request.user)
+            return
+        # Le projet est créé sur le shard choisi à partir de son identifiant
+        project_id = allocator.next_id(Project)
+        database = choose_shard(project_id)
+        ProjectShard.objects.using('default').create(project_id=project_id, database=database)
+        with activate_shard(database):
+            serializer.save(author=self.request.user, id=project_id)
 
     def get_queryset(self):
+        if settings.DATABASE_SHARDS:
+            return projects_for_user(self.request.user, author_only=True)
         return Project.objects.filter(author=self.request.user)
 
 
@@ -121,10 +149,10 @@ class ProjectDetail(APIView):
         return queryset
 
     def get_project(self):
-        return get_object_or_404(Project, pk=self.kwargs['pk'])
+        return get_cached_object_or_404(Project, self.kwargs['pk'])
 
     def check_author(self, user, project):
-        if project.author != user:
+        if project.author_id != user.id:
             raise PermissionDenied('You are not allowed.')
 
     def get_object(self):
@@ -139,23 +167,32 @@ class ProjectDetail(APIView):
         return Response(serializer.data)
 
     def put(self, request, *args, **kwargs):
-        project = self.get_project()
-        self.check_author(request.user, project)
-        # Je récupère les données de la requête
-        data = request.data
-        # Je m'assure que certains champs ne soient pas modifiés
-        data['id'] = project.id
-        data['author'] = project.author
-        serializer = self.serializer_class(project, data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        # Je modifie le projet tel qu'il est en base, et non sa copie en cache
+        with transaction.atomic(using=router.db_for_write(Project)):
+            project = get_object_for_update_or_404(Project, self.kwargs['pk'])
+            self.check_author(request.user, project)
+            # Je récupère les données de la requête
+            data = request.data
+            # Je m'assure que certains champs ne soient pas modifiés
+            data['id'] = project.id
+            data['author'] = project.author_id
+            serializer = self.serializer_class(project, data=request.data)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, *args, **kwargs):
-        project = self.get_project()
-        self.check_author(request.user, project)
-        project.delete()
+        with transaction.atomic(using=router.db_for_write(Project)):
+            project = get_object_for_update_or_404(Project, self.kwargs['pk'])
+            self.check_author(request.user, project)
+            assignee_ids = list(
+                Issue.objects.filter(project=project, status__in=Issue.OPEN_STATUSES, assignee__isnull=False)
+                .order_by().values_list('assignee_id', flat=True).distinct()
+            )
+            project.delete()
+        # Je recalcule en une fois les compteurs des assignés des problèmes supprimés
+        recount(assignee_ids)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -169,6 +206,10 @@ class ContributorsProjectDetail(generics.RetrieveAPIView):
     Méthodes:
     - `get` : Récupère tous les contributeurs du projet spécifié.
     - `post` : Ajoute un nouveau contributeur au projet spécifié. L'utilisateur doit être l'auteur du projet.
+    - `put` : Remplace l'ensemble des contributeurs par la liste `users` (identifiants ou noms d'utilisateur).
+       L'utilisateur doit être l'auteur du projet.
+    - `patch` : Ajoute les contributeurs de la liste `users` qui ne le sont pas déjà.
+       L'utilisateur doit être l'auteur du projet.
     - `delete` : Supprime un contributeur spécifique du projet. L'utilisateur doit être l'auteur du projet.
 
     Attributs:
@@ -178,27 +219,22 @@ class ContributorsProjectDetail(generics.RetrieveAPIView):
     serializer_class = ContributorSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_contributors(self):
-        project = self.get_project()
-        contributors = Contributor.objects.filter(project=project)
-        return contributors
-
     def get_project(self):
-        return get_object_or_404(Project, pk=self.kwargs['pk'])
+        return get_cached_object_or_404(Project, self.kwargs['pk'])
 
     def check_author(self, user, project):
-        if project.author != user:
+        if project.author_id != user.id:
             raise PermissionDenied('You are not allowed.')
 
     def contributor_exist(self, user, project):
         if project.contributors.filter(user=user).exists():
             raise PermissionDenied("You are not allowed.")
 
+    def get_contributor_ids(self, project):
+        return list(Contributor.objects.filter(project=project).order_by('id').values_list('user_id', flat=True))
+
     def get(self, request, *args, **kwargs):
-        contributors = self.get_contributors()
-        serializer = self.serializer_class(contributors, many=True)
-        user_ids = [contributor['user'] for contributor in serializer.data]
-        return Response(user_ids)
+        return Response(self.get_contributor_ids(self.get_project()))
 
     def post(self, request, *args, **kwargs):
         project = self.get_project()
@@ -214,10 +250,62 @@ class ContributorsProjectDetail(generics.RetrieveAPIView):
 
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
-            serializer.save(project=project)
+            contributor = serializer.save(project=project)
+            # Les problèmes assignés au nouveau contributeur apparaissent dans sa boîte de réception
+            recount([contributor.user_id])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def put(self, request, *args, **kwargs):
+        return self.set_contributors(request, replace=True)
+
+    def patch(self, request, *args, **kwargs):
+        return self.set_contributors(request, replace=False)
+
+    def resolve_users(self, users):
+        # Je vérifie le type de chaque élément avant tout (un objet ou une liste n'est pas hashable)
+        if not all(isinstance(user, str) or (isinstance(user, int) and not isinstance(user, bool)) for user in users):
+            return None, ['Users must be ids or usernames.']
+        # Je sépare les identifiants des noms d'utilisateur, puis je les résous en une seule requête
+        ids = {user for user in users if isinstance(user, int)}
+        names = {user for user in users if isinstance(user, str)}
+        found = User.objects.filter(Q(pk__in=ids) | Q(username__in=names)).values_list('id', 'username')
+        found_ids = {user_id for user_id, _ in found}
+        found_names = {username for _, username in found}
+        unknown = sorted(map(str, ids - found_ids)) + sorted(names - found_names)
+        if unknown:
+            return None, [f'Unknown users: {", ".join(unknown)}.']
+        return {user_id for user_id, username in found if user_id in ids or username in names}, None
+
+    def set_contributors(self, request, replace):
+        project = self.get_project()
+        self.check_author(request.user, project)
+        users = request.data.get('users') if isinstance(request.data, dict) else None
+        if not isinstance(users, list):
+            return Response({'users': ['This field must be a list.']}, status=status.HTTP_400_BAD_REQUEST)
+        user_ids, errors = self.resolve_users(users)
+        if errors:
+            return Response({'users': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(using=router.db_for_write(Contributor)):
+            existing = set(Contributor.objects.filter(project=project).values_list('user_id', flat=True))
+            added = user_ids - existing
+            removed = existing - user_ids if replace else set()
+            Contributor.objects.bulk_create(
+                assign_ids([Contributor(project=project, user_id=user_id) for user_id in sorted(added)]),
+                batch_size=1000
+            )
+            if removed:
+                Contributor.objects.filter(project=project, user_id__in=removed).delete()
+            if shards_enabled():
+                # Je mets à jour l'index des projets par utilisateur en une requête par opération
+                index_project_members(project, added)
+                unindex_project_members(project.pk, removed, project._state.db)
+        # La boîte de réception ne montre que les projets accessibles : je recalcule en une fois les compteurs
+        # des contributeurs ajoutés et retirés
+        recount(added | removed)
+        return Response(self.get_contributor_ids(project))
+
     def delete(self, request, *args, **kwargs):
         project = self.get_project()
         self.check_author(request.user, project)
@@ -225,6 +313,9 @@ class ContributorsProjectDetail(generics.RetrieveAPIView):
         contributors = Contributor.objects.filter(project=project, user=user)
         if contributors.exists():
             contributors.delete()
+            if shards_enabled():
+                unindex_project_members(project.pk, [user.id], project._state.db)
+            recount([user.id])
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
             return Response({"error": "Error with your request."}, status=status.HTTP_404_NOT_FOUND)
@@ -247,20 +338,23 @@ class IssuesProjectDetail(APIView):
     Attributs:
     - `serializer_class` : Spécifie le sérialiseur à utiliser pour le traitement des données.
     - `permission_classes` : Spécifie les classes de permission à utiliser pour déterminer l'accès à la vue.
+    - `compression_levels` : Niveaux de compression des réponses de cette vue (voir `api/compression.py`).
     """
+    # Listes volumineuses et répétitives : compression plus forte
+    compression_levels = {'gzip': 6, 'br': 5, 'zstd': 6}
     serializer_class = IssueSerializer
     permission_classes = [IsAuthenticated]
 
     def check_author_or_contributor(self, user, project):
-        if project.author != user and not project.contributors.filter(user=user).exists():
+        if project.author_id != user.id and not project.contributors.filter(user=user).exists():
             raise PermissionDenied("You are not allowed.")
 
     def check_author_issue(self, user, issue):
-        if issue.author != user:
+        if issue.author_id != user.id:
             raise PermissionDenied("You are not allowed.")
 
     def post(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
         # Je vérifie si l'utilisateur est contributeur ou auteur du projet
         self.check_author_or_contributor(request.user, project)
         # Je récupère les données de la requête
@@ -275,7 +369,10 @@ class IssuesProjectDetail(APIView):
         data['project'] = project.id
         serializer = self.serializer_class(data=data)
         if serializer.is_valid():
-            serializer.save(project=project, author=request.user)
+            # La notification de l'assigné est écrite dans la même transaction que le problème
+            with transaction.atomic(using=router.db_for_write(Issue)):
+                issue = serializer.save(project=project, author=request.user)
+                notify_assignment(issue, request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -283,12 +380,17 @@ class IssuesProjectDetail(APIView):
         issues = Issue.objects.filter(project=project)
         return issues
 
-    def get_issue(self, project, id_issue):
-        issue = Issue.objects.get(project=project, pk=id_issue)
+    def get_issue(self, project, id_issue, for_update=False):
+        if for_update:
+            issue = get_object_for_update_or_404(Issue, id_issue)
+        else:
+            issue = get_cached_object_or_404(Issue, id_issue)
+        if issue.project_id != project.id:
+            raise Http404
         return issue
 
     def get(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
         # Je vérifie si l'utilisateur est contributeur ou auteur du projet
         self.check_author_or_contributor(request.user, project)
         issues = self.get_issues(project)
@@ -296,26 +398,39 @@ class IssuesProjectDetail(APIView):
         return Response(serializer.data)
 
     def put(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        issue = self.get_issue(project, self.kwargs['id_issue'])
-        self.check_author_issue(request.user, issue)
-        # Je récupère les données de la requête
-        data = request.data
-        # Je m'assure que certains champs ne soient pas modifiés
-        data['id'] = issue.id
-        data['project'] = project.id
-        data['author'] = issue.author
-        serializer = self.serializer_class(issue, data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
+        # Je modifie le problème tel qu'il est en base, et non sa copie en cache
+        with transaction.atomic(using=router.db_for_write(Issue)):
+            issue = self.get_issue(project, self.kwargs['id_issue'], for_update=True)
+            self.check_author_issue(request.user, issue)
+            # Je récupère les données de la requête
+            data = request.data
+            # Je m'assure que certains champs ne soient pas modifiés
+            data['id'] = issue.id
+            data['project'] = project.id
+            data['author'] = issue.author_id
+            # Comme à la création, l'assigné doit être l'auteur du projet ou un de ses contributeurs
+            assignee_id = data.get('assignee')
+            if assignee_id is not None and assignee_id != issue.assignee_id:
+                user_assignee = get_object_or_404(User, pk=assignee_id)
+                self.check_author_or_contributor(user_assignee, project)
+            previous_assignee_id = issue.assignee_id
+            serializer = self.serializer_class(issue, data=request.data)
+            if serializer.is_valid():
+                issue = serializer.save()
+                if issue.assignee_id != previous_assignee_id:
+                    notify_assignment(issue, request.user)
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        issue = self.get_issue(project, self.kwargs['id_issue'])
-        self.check_author_issue(request.user, issue)
-        issue.delete()
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
+        with transaction.atomic(using=router.db_for_write(Issue)):
+            issue = self.get_issue(project, self.kwargs['id_issue'], for_update=True)
+            self.check_author_issue(request.user, issue)
+            issue.delete()
+        if issue.assignee_id is not None and issue.status in Issue.OPEN_STATUSES:
+            recount([issue.assignee_id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -334,21 +449,24 @@ class CommentProjectDetail(APIView):
     Attributs:
     - `serializer_class` : Spécifie le sérialiseur à utiliser pour le traitement des données.
     - `permission_classes` : Spécifie les classes de permission à utiliser pour déterminer l'accès à la vue.
+    - `compression_levels` : Niveaux de compression des réponses de cette vue (voir `api/compression.py`).
     """
+    # Listes volumineuses et répétitives : compression plus forte
+    compression_levels = {'gzip': 6, 'br': 5, 'zstd': 6}
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
 
     def check_author_or_contributor(self, user, project):
-        if project.author != user and not project.contributors.filter(user=user).exists():
+        if project.author_id != user.id and not project.contributors.filter(user=user).exists():
             raise PermissionDenied("You are not allowed.")
 
     def check_issue_of_project(self, project, issue):
-        if issue.project != project:
+        if issue.project_id != project.id:
             raise PermissionDenied("You are not allowed.")
 
     def post(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        issue = get_object_or_404(Issue, pk=self.kwargs['id_issue'])
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
+        issue = get_cached_object_or_404(Issue, self.kwargs['id_issue'])
         # Je vérifie si l'utilisateur est contributeur ou auteur du projet
         # Je vérifie également si le problème fait bien parti du projet donné
         self.check_author_or_contributor(request.user, project)
@@ -357,7 +475,9 @@ class CommentProjectDetail(APIView):
         data = request.data
         serializer = self.serializer_class(data=data)
         if serializer.is_valid():
-            serializer.save(issue=issue, author=request.user)
+            with transaction.atomic(using=router.db_for_write(Comment)):
+                comment = serializer.save(issue=issue, author=request.user)
+                notify_comment(comment, request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -366,8 +486,8 @@ class CommentProjectDetail(APIView):
         return issues
 
     def get(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        issue = get_object_or_404(Issue, pk=self.kwargs['id_issue'])
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
+        issue = get_cached_object_or_404(Issue, self.kwargs['id_issue'])
         # Je vérifie si l'utilisateur est contributeur ou auteur du projet
         # Je vérifie également si le problème fait bien parti du projet donné
         self.check_author_or_contributor(request.user, project)
@@ -400,19 +520,19 @@ class CommentUpdateDelete(APIView):
     permission_classes = [IsAuthenticated]
 
     def check_author_or_contributor(self, user, project):
-        if project.author != user and not project.contributors.filter(user=user).exists():
+        if project.author_id != user.id and not project.contributors.filter(user=user).exists():
             raise PermissionDenied("You are not allowed.")
 
     def check_issue_of_project(self, project, issue):
-        if issue.project != project:
+        if issue.project_id != project.id:
             raise PermissionDenied("You are not allowed.")
 
     def check_comment_of_issue(self, issue, comment):
-        if comment.issue != issue:
+        if comment.issue_id != issue.id:
             raise PermissionDenied("You are not allowed.")
 
     def check_author_of_comment(self, user, comment):
-        if comment.author != user:
+        if comment.author_id != user.id:
             raise PermissionDenied("You are not allowed.")
 
     def get_comments(self, issue):
@@ -420,9 +540,9 @@ class CommentUpdateDelete(APIView):
         return issues
 
     def get(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        issue = get_object_or_404(Issue, pk=self.kwargs['id_issue'])
-        comment = get_object_or_404(Comment, pk=self.kwargs['id_comment'])
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
+        issue = get_cached_object_or_404(Issue, self.kwargs['id_issue'])
+        comment = get_cached_object_or_404(Comment, self.kwargs['id_comment'])
         # Je vérifie si l'utilisateur est contributeur ou auteur du projet
         # Je vérifie également si le problème fait bien parti du projet donné
         self.check_author_or_contributor(request.user, project)
@@ -432,37 +552,216 @@ class CommentUpdateDelete(APIView):
         return Response(serializer.data)
 
     def put(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        issue = get_object_or_404(Issue, pk=self.kwargs['id_issue'])
-        comment = get_object_or_404(Comment, pk=self.kwargs['id_comment'])
-        # Je vérifie si l'utilisateur est contributeur ou auteur du projet
-        # Je vérifie également si le problème fait bien parti du projet donné
-        self.check_author_or_contributor(request.user, project)
-        self.check_author_of_comment(request.user, comment)
-        self.check_issue_of_project(project, issue)
-        self.check_comment_of_issue(issue, comment)
-        # Je récupère les données de la requête
-        # et je m'assure qu'on ne change que la description
-        data = request.data
-        data['id'] = comment.id
-        data['author'] = comment.author
-        data['issue'] = comment.issue
-        data['created_time'] = comment.created_time
-        serializer = self.serializer_class(comment, data=data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
+        issue = get_cached_object_or_404(Issue, self.kwargs['id_issue'])
+        # Je modifie le commentaire tel qu'il est en base, et non sa copie en cache
+        with transaction.atomic(using=router.db_for_write(Comment)):
+            comment = get_object_for_update_or_404(Comment, self.kwargs['id_comment'])
+            # Je vérifie si l'utilisateur est contributeur ou auteur du projet
+            # Je vérifie également si le problème fait bien parti du projet donné
+            self.check_author_or_contributor(request.user, project)
+            self.check_author_of_comment(request.user, comment)
+            self.check_issue_of_project(project, issue)
+            self.check_comment_of_issue(issue, comment)
+            # Je récupère les données de la requête
+            # et je m'assure qu'on ne change que la description
+            data = request.data
+            data['id'] = comment.id
+            data['author'] = comment.author_id
+            data['issue'] = comment.issue_id
+            data['created_time'] = comment.created_time
+            serializer = self.serializer_class(comment, data=data)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, *args, **kwargs):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        issue = get_object_or_404(Issue, pk=self.kwargs['id_issue'])
-        comment = get_object_or_404(Comment, pk=self.kwargs['id_comment'])
-        # Je vérifie si l'utilisateur est contributeur ou auteur du projet
-        # Je vérifie également si le problème fait bien parti du projet donné
-        self.check_author_or_contributor(request.user, project)
-        self.check_author_of_comment(request.user, comment)
-        self.check_issue_of_project(project, issue)
-        self.check_comment_of_issue(issue, comment)
-        comment.delete()
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
+        issue = get_cached_object_or_404(Issue, self.kwargs['id_issue'])
+        with transaction.atomic(using=router.db_for_write(Comment)):
+            comment = get_object_for_update_or_404(Comment, self.kwargs['id_comment'])
+            # Je vérifie si l'utilisateur est contributeur ou auteur du projet
+            # Je vérifie également si le problème fait bien parti du projet donné
+            self.check_author_or_contributor(request.user, project)
+            self.check_author_of_comment(request.user, comment)
+            self.check_issue_of_project(project, issue)
+            self.check_comment_of_issue(issue, comment)
+            comment.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProjectReport(APIView):
+    """
+    Vue permettant de consulter les indicateurs de suivi d'un projet, par semaine ou par mois.
+
+    La classe `ProjectReport` hérite de la classe `APIView` de Django Rest Framework.
+    Les indicateurs sont calculés par la base à partir de l'historique des statuts (voir api/reports.py).
+
+    Méthodes:
+    - `get` : Récupère, pour chaque période, le débit (problèmes terminés), les percentiles du temps de cycle
+       et le travail en cours. Paramètres : `period` (`week` ou `month`), `start` et `end` (dates AAAA-MM-JJ,
+       par défaut la dernière année). L'utilisateur doit être l'auteur du projet ou un de ses contributeurs.
+
+    Attributs:
+    - `permission_classes` : Spécifie les classes de permission à utiliser pour déterminer l'accès à la vue.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        project = get_cached_object_or_404(Project, self.kwargs['pk'])
+        if project.author_id != request.user.id and not project.contributors.filter(user=request.user).exists():
+            raise PermissionDenied("You are not allowed.")
+        params = request.query_params
+        period = params.get('period', 'week')
+        if period not in PERIODS:
+            return Response({'period': ['Must be one of: week, month.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end = date.fromisoformat(params['end']) if 'end' in params else timezone.localdate()
+            start = date.fromisoformat(params['start']) if 'start' in params else end - timedelta(days=365)
+        except ValueError:
+            return Response({'error': 'Dates must use the YYYY-MM-DD format.'}, status=status.HTTP_400_BAD_REQUEST)
+        except OverflowError:
+            # Début par défaut antérieur à la première date représentable (ex: `end=0001-01-05`)
+            return Response({'error': 'Invalid date range.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Le nombre de périodes est vérifié avant de les énumérer
+        if start > end or period_count(period, start, end) > settings.REPORT_MAX_PERIODS:
+            return Response({'error': 'Invalid date range.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            report = project_report(project.id, period, start, end)
+        except OverflowError:
+            # Dernière période se terminant après la dernière date représentable (ex: `end=9999-12-31`)
+            return Response({'error': 'Invalid date range.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+
+class InboxView(APIView):
+    """
+    Vue permettant de consulter les problèmes ouverts assignés à l'utilisateur, tous projets confondus.
+
+    La classe `InboxView` hérite de la classe `APIView` de Django Rest Framework.
+    Seuls les problèmes des projets dont l'utilisateur est l'auteur ou un contributeur sont listés.
+
+    Méthodes:
+    - `get` : Récupère une page de problèmes, du plus récent au plus ancien (paramètres `limit` et `cursor`),
+       le curseur de la page suivante (`next`) et les compteurs `open` et `unread`.
+
+    Attributs:
+    - `serializer_class` : Spécifie le sérialiseur à utiliser pour le traitement des données.
+    - `permission_classes` : Spécifie les classes de permission à utiliser pour déterminer l'accès à la vue.
+    """
+    serializer_class = IssueSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get('limit', settings.INBOX_PAGE_SIZE))
+            cursor = request.query_params.get('cursor')
+            cursor = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return Response({'error': 'Invalid limit or cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), settings.INBOX_MAX_PAGE_SIZE)
+        issues, next_cursor = inbox_page(request.user.id, limit, cursor)
+        return Response({
+            'results': self.serializer_class(issues, many=True).data,
+            'next': next_cursor,
+            'counts': get_counts(request.user.id),
+        })
+
+
+class InboxRead(APIView):
+    """
+    Vue permettant de marquer la boîte de réception comme lue.
+
+    La classe `InboxRead` hérite de la classe `APIView` de Django Rest Framework.
+
+    Méthodes:
+    - `post` : Remet à zéro le compteur `unread` de l'utilisateur et renvoie ses compteurs.
+
+    Attributs:
+    - `permission_classes` : Spécifie les classes de permission à utiliser pour déterminer l'accès à la vue.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        return Response(mark_read(request.user.id))
+
+
+class ProfileList(APIView):
+    """
+    Vue listant les profils de requêtes enregistrés par `ProfilingMiddleware`.
+
+    La classe `ProfileList` hérite de la classe `APIView` de Django Rest Framework.
+    Elle est réservée aux administrateurs.
+
+    Méthodes:
+    - `get` : Récupère la liste des profils, du plus récent au plus ancien (sans le détail des requêtes SQL).
+
+    Attributs:
+    - `permission_classes` : Spécifie les classes de permission à utiliser pour déterminer l'accès à la vue.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(list_reports())
+
+
+class ProfileDetail(APIView):
+    """
+    Vue permettant de consulter un profil de requête spécifique.
+
+    La classe `ProfileDetail` hérite de la classe `APIView` de Django Rest Framework.
+    Elle est réservée aux administrateurs.
+
+    Méthodes:
+    - `get` : Récupère le rapport du profil (requêtes SQL avec leur origine, résumé cProfile).
+              Avec `?download=1`, renvoie le fichier brut (`.prof` pour pstats/snakeviz,
+              `.folded` pour un flamegraph).
+
+    Attributs:
+    - `permission_classes` : Spécifie les classes de permission à utiliser pour déterminer l'accès à la vue.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        report = load_report(self.kwargs['name'])
+        if report is None:
+            raise Http404
+        if request.query_params.get('download'):
+            extension = 'prof' if report['mode'] == 'cprofile' else 'folded'
+            path = settings.PROFILING_DIR / f"{report['name']}.{extension}"
+            return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
+        return Response(report)
+
+
+class BatchView(APIView):
+    """
+    Vue permettant d'exécuter plusieurs requêtes de l'API en un seul aller-retour.
+
+    La classe `BatchView` hérite de la classe `APIView` de Django Rest Framework.
+    Les sous-requêtes sont exécutées dans le processus, via le résolveur d'URL, avec l'utilisateur
+    déjà authentifié et l'identity map de la requête (voir api/batch.py).
+
+    Méthodes:
+    - `post` : Exécute la liste `requests` (objets `method`, `path` et `body` facultatif) dans l'ordre
+       et renvoie, pour chacune, son code de statut, ses en-têtes et son corps.
+       Avec `"parallel": true`, les lectures consécutives sont exécutées en même temps.
+
+    Attributs:
+    - `permission_classes` : Spécifie les classes de permission à utiliser pour déterminer l'accès à la vue.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            specs = parse_batch(request.data)
+        except BatchError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        results, wrote = run_batch(
+            request,
+            specs,
+            parallel=request.data.get('parallel') is True,
+            pinned=getattr(request, 'primary_pinned', False)
+        )
+        request._request.batch_wrote = wrote
+        return Response(results)
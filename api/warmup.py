@@ -0,0 +1,67 @@
+import time
+
+from django.db import connections
+from django.urls import get_resolver
+from rest_framework import serializers as drf_serializers
+
+from . import serializers
+
+
+def warm_urls():
+    # Compile les expressions régulières de toutes les routes et construit les tables de reverse()
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+
+
+def warm_serializers():
+    # Construit la table des champs de chaque sérialiseur (et les caches `_meta` des modèles)
+    for value in vars(serializers).values():
+        if (
+            isinstance(value, type)
+            and issubclass(value, drf_serializers.ModelSerializer)
+            and value.__module__ == serializers.__name__
+        ):
+            value().fields
+
+
+def warm_jwt():
+    # Prépare les clés de signature et charge le code d'encodage/décodage des jetons
+    from rest_framework_simplejwt.tokens import AccessToken
+    AccessToken(str(AccessToken()))
+
+
+def warm_databases():
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+STEPS = [
+    ('urls', warm_urls),
+    ('serializers', warm_serializers),
+    ('jwt', warm_jwt),
+    ('databases', warm_databases),
+]
+
+
+def warmup(connect_db=True):
+    """
+    Précharge ce que les premières requêtes d'un worker devraient sinon initialiser elles-mêmes.
+
+    Appelée depuis `wsgi.py`/`asgi.py` avant que le worker n'accepte du trafic.
+    Retourne la durée de chaque étape (en secondes).
+
+    Attention : avec un serveur qui charge l'application avant de forker (ex: `gunicorn --preload`),
+    les connexions ouvertes ici seraient partagées entre les workers. Dans ce cas, désactivez le
+    préchargement automatique (`DRFPROJET10_WARMUP=0`) et appelez `warmup()` après le fork
+    (ex: hook `post_fork` de gunicorn).
+    """
+    timings = {}
+    for name, step in STEPS:
+        if name == 'databases' and not connect_db:
+            continue
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    return timings
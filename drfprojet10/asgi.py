@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'drfprojet10.settings')
 
 application = get_asgi_application()
+
+# Préchargement avant que le worker n'accepte du trafic (désactivable avec DRFPROJET10_WARMUP=0)
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ON_STARTUP:
+    from api.warmup import warmup  # noqa: E402
+    warmup()
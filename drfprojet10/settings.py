@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -20,13 +23,23 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
+# Profil de production (DRFPROJET10_ENV=production) : DEBUG désactivé, clé secrète et hôtes lus dans
+# l'environnement, pile de middlewares et rendus réduits à ce qu'utilise l'API (voir plus bas)
+PRODUCTION = os.environ.get('DRFPROJET10_ENV') == 'production'
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-w+du87-hyo8^d%m(%m+!#06#2dt6nn#-ir2-vel9)tavb26l1&'
+if PRODUCTION:
+    if not os.environ.get('DRFPROJET10_SECRET_KEY'):
+        raise ImproperlyConfigured('DRFPROJET10_SECRET_KEY must be set in production.')
+    SECRET_KEY = os.environ['DRFPROJET10_SECRET_KEY']
+else:
+    SECRET_KEY = 'django-insecure-w+du87-hyo8^d%m(%m+!#06#2dt6nn#-ir2-vel9)tavb26l1&'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# (avec DEBUG, chaque requête SQL est conservée dans `connection.queries`)
+DEBUG = not PRODUCTION
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get('DRFPROJET10_ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -43,7 +56,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.compression.CompressionMiddleware',
+    'api.middleware.ReadYourWritesMiddleware',
+    'api.middleware.ProjectShardMiddleware',
+    'api.middleware.ObjectCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -52,6 +70,47 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Middlewares utiles uniquement à l'admin (l'API s'authentifie par JWT). En production, ils sont retirés
+# de la pile principale et exécutés pour les seules URLs commençant par ADMIN_URL_PREFIX
+# (voir api.middleware.AdminMiddlewareStack).
+ADMIN_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+ADMIN_URL_PREFIX = '/admin/'
+
+if PRODUCTION:
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE if middleware not in ADMIN_MIDDLEWARE
+    ] + ['api.middleware.AdminMiddlewareStack']
+    # L'admin vérifie la présence de ces middlewares dans MIDDLEWARE ; ils sont exécutés par AdminMiddlewareStack
+    SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+# Mode API seule : l'admin, les sessions et les messages ne sont ni chargés au démarrage ni exécutés
+# à chaque requête (l'authentification de l'API se fait uniquement par JWT)
+API_ONLY = os.environ.get('DRFPROJET10_API_ONLY') == '1'
+
+if API_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in ('django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages')
+    ]
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware not in (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+            'api.middleware.AdminMiddlewareStack',
+        )
+    ]
+
+# Préchargement (URLs, sérialiseurs, clés JWT, connexions) au chargement de wsgi.py/asgi.py, voir api/warmup.py
+WARMUP_ON_STARTUP = os.environ.get('DRFPROJET10_WARMUP', '1') == '1'
+
 ROOT_URLCONF = 'drfprojet10.urls'
 
 TEMPLATES = [
@@ -70,6 +129,20 @@ TEMPLATES = [
     },
 ]
 
+if API_ONLY:
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove('django.contrib.messages.context_processors.messages')
+
+if PRODUCTION:
+    # Templates de l'admin compilés une seule fois par processus
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove('django.template.context_processors.debug')
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'drfprojet10.wsgi.application'
 
 
@@ -83,6 +156,33 @@ DATABASES = {
     }
 }
 
+# Réplicas en lecture : DRFPROJET10_DB_REPLICAS=N déclare les alias replica_1 ... replica_N.
+# En local ce sont des fichiers SQLite alimentés par `python manage.py replicate_sqlite`.
+DATABASE_REPLICAS = []
+for index in range(1, int(os.environ.get('DRFPROJET10_DB_REPLICAS', 0)) + 1):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_replica_{index}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+# Sharding par projet : DRFPROJET10_DB_SHARDS=N déclare les alias shard_1 ... shard_N.
+# Les projets, contributeurs, problèmes et commentaires d'un même projet sont regroupés sur un shard ;
+# les utilisateurs et l'annuaire des projets restent sur la base principale (voir api/sharding.py).
+DATABASE_SHARDS = []
+for index in range(1, int(os.environ.get('DRFPROJET10_DB_SHARDS', 0)) + 1):
+    DATABASES[f'shard_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_shard_{index}.sqlite3',
+    }
+    DATABASE_SHARDS.append(f'shard_{index}')
+
+DATABASE_ROUTERS = ['api.routers.ProjectShardRouter', 'api.routers.PrimaryReplicaRouter']
+
+# Durée pendant laquelle un client qui vient d'écrire lit sur la base principale
+READ_YOUR_WRITES_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -103,6 +203,96 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/4.2/topics/auth/passwords/
+
+# Hachage des mots de passe : coût configurable et calcul dans un pool de processus borné (voir api/hashing.py)
+PASSWORD_HASHERS = [
+    'api.hashing.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('DRFPROJET10_PASSWORD_HASH_ITERATIONS', 600000))
+# Nombre de processus du pool (0 : calcul dans le thread de la requête) et nombre de calculs en attente tolérés.
+# Chaque processus du serveur (ex: worker gunicorn) a son propre pool : le total est multiplié par leur nombre.
+PASSWORD_HASHING_WORKERS = int(os.environ.get('DRFPROJET10_PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE_SIZE = int(os.environ.get('DRFPROJET10_PASSWORD_HASHING_QUEUE_SIZE', 32))
+PASSWORD_HASHING_TIMEOUT = 10
+
+AUTHENTICATION_BACKENDS = [
+    'api.hashing.PooledModelBackend',
+]
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Cache partagé entre les processus (Redis si DRFPROJET10_REDIS_URL est défini, sinon en mémoire du processus)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if os.environ.get('DRFPROJET10_REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['DRFPROJET10_REDIS_URL'],
+    }
+
+# Cache des projets, problèmes et commentaires par clé primaire (voir api/cache.py)
+OBJECT_CACHE_TIMEOUT = 300
+OBJECT_CACHE_LOCAL_SIZE = 10000
+OBJECT_CACHE_LOCAL_TTL = 5
+
+
+# Response compression
+# Compression des réponses (voir api/compression.py). Les vues peuvent redéfinir les niveaux
+# avec l'attribut `compression_levels`. brotli et zstd nécessitent les paquets `brotli` et `zstandard`.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVELS = {'gzip': 5, 'br': 4, 'zstd': 3}
+# Nombre de réponses compressées conservées par processus (0 : pas de cache) et leur durée de vie
+COMPRESSION_CACHE_SIZE = 256
+COMPRESSION_CACHE_TTL = 60
+
+
+# Batch requests
+# Requêtes groupées (`/batch/`, voir api/batch.py) : nombre maximal de sous-requêtes par lot
+# et nombre de threads exécutant les lectures en parallèle
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+
+# Project reports
+# Rapports par projet (voir api/reports.py) : durée de conservation en cache des périodes terminées
+# et nombre maximal de périodes par rapport
+REPORT_CACHE_TIMEOUT = 7 * 24 * 3600
+REPORT_MAX_PERIODS = 260
+
+
+# Inbox
+# Boîte de réception (`/inbox/`, voir api/inbox.py) : taille de page par défaut et maximale
+INBOX_PAGE_SIZE = 50
+INBOX_MAX_PAGE_SIZE = 200
+
+
+# Admin
+# Au-delà de ce nombre de lignes, les listes non filtrées de l'admin affichent un total estimé (voir api/admin.py)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+# Request profiling
+# Profilage des requêtes à la demande (en-tête X-Profile signé) ou par échantillonnage (voir api/profiling.py)
+PROFILING_DIR = Path(os.environ.get('DRFPROJET10_PROFILING_DIR', BASE_DIR / 'profiles'))
+PROFILING_SAMPLE_RATE = float(os.environ.get('DRFPROJET10_PROFILING_SAMPLE_RATE', 0))
+# Profileur utilisé pour les requêtes échantillonnées : 'cprofile' ou 'sampling'
+PROFILING_SAMPLE_MODE = 'sampling'
+PROFILING_SAMPLING_INTERVAL = 0.005
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_MAX_FILES = 200
+
+
 # JWT Token
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -110,6 +300,11 @@ REST_FRAMEWORK = {
     ),
 }
 
+if PRODUCTION:
+    # JSON uniquement : ni API navigable, ni formulaires
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ('rest_framework.renderers.JSONRenderer',)
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = ('rest_framework.parsers.JSONParser',)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -137,3 +332,19 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Notifications (outbox transactionnelle, envoyée par `python manage.py send_notifications`)
+# Transport : 'email' (backend e-mail de Django) ou 'webhook' (POST JSON vers NOTIFICATIONS_WEBHOOK_URL)
+NOTIFICATIONS_TRANSPORT = os.environ.get('DRFPROJET10_NOTIFICATIONS_TRANSPORT', 'email')
+NOTIFICATIONS_WEBHOOK_URL = os.environ.get('DRFPROJET10_NOTIFICATIONS_WEBHOOK_URL', '')
+NOTIFICATIONS_WEBHOOK_TIMEOUT = 10
+NOTIFICATIONS_BATCH_SIZE = 100
+NOTIFICATIONS_LEASE_SECONDS = 300
+NOTIFICATIONS_MAX_ATTEMPTS = 8
+NOTIFICATIONS_RETRY_BASE_SECONDS = 30
+NOTIFICATIONS_RETRY_MAX_SECONDS = 3600
+
+EMAIL_BACKEND = os.environ.get('DRFPROJET10_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+DEFAULT_FROM_EMAIL = os.environ.get('DRFPROJET10_DEFAULT_FROM_EMAIL', 'noreply@softdesk.local')
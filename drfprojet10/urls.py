@@ -14,7 +14,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from api.views import (
@@ -24,12 +24,17 @@ from api.views import (
     ContributorsProjectDetail,
     IssuesProjectDetail,
     CommentProjectDetail,
-    CommentUpdateDelete
+    CommentUpdateDelete,
+    ProjectReport,
+    InboxView,
+    InboxRead,
+    ProfileList,
+    ProfileDetail,
+    BatchView
 )
 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('signup/', SignupView.as_view(), name='signup'),
     path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -53,4 +58,15 @@ urlpatterns = [
         CommentUpdateDelete.as_view(),
         name='comment_update_delete'
     ),
+    path('projects/<int:pk>/report/', ProjectReport.as_view(), name='project_report'),
+    path('inbox/', InboxView.as_view(), name='inbox'),
+    path('inbox/read/', InboxRead.as_view(), name='inbox_read'),
+    path('profiles/', ProfileList.as_view(), name='profile_list'),
+    path('profiles/<str:name>/', ProfileDetail.as_view(), name='profile_detail'),
+    path('batch/', BatchView.as_view(), name='batch'),
 ]
+
+# L'admin n'est importé que s'il est installé (il ne l'est pas en mode API seule)
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.insert(0, path('admin/', admin.site.urls))